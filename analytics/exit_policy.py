@@ -1180,24 +1180,27 @@ def should_exit(
     *,
     liq_now: float | None = None,
     pnl_pct: float | None = None,
+    age_s: float | None = None,
 ) -> str | None:
     policy = effective_exit_policy(subject)
 
-    opened = _get(subject, "opened_at")
-    if isinstance(opened, str):
-        try:
-            opened = dt.datetime.fromisoformat(opened)
-        except Exception:
-            opened = None
-    if isinstance(opened, dt.datetime) and opened.tzinfo is None:
-        opened = opened.replace(tzinfo=dt.timezone.utc)
-    if not isinstance(opened, dt.datetime):
-        opened = now if now.tzinfo is not None else now.replace(tzinfo=dt.timezone.utc)
-
-    if now.tzinfo is None:
-        now = now.replace(tzinfo=dt.timezone.utc)
-
-    age_s = max(0.0, (now - opened).total_seconds())
+    if age_s is None:
+        opened = _get(subject, "opened_at")
+        if isinstance(opened, str):
+            try:
+                opened = dt.datetime.fromisoformat(opened)
+            except Exception:
+                opened = None
+        if isinstance(opened, dt.datetime) and opened.tzinfo is None:
+            opened = opened.replace(tzinfo=dt.timezone.utc)
+        if not isinstance(opened, dt.datetime):
+            opened = now if now.tzinfo is not None else now.replace(tzinfo=dt.timezone.utc)
+
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=dt.timezone.utc)
+
+        age_s = (now - opened).total_seconds()
+    age_s = max(0.0, float(age_s))
     age_h = age_s / 3600.0
     age_min = age_s / 60.0
 
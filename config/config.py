@@ -3029,6 +3029,9 @@ class _Config:
 
     # ------- base de datos -----------------------------------------
     SQLITE_DB: str = os.getenv("SQLITE_DB", "data/memebotdatabase.db")
+    # pool async: ≥ EVAL_CONCURRENCY sesiones simultáneas + monitor/labeler
+    DB_POOL_SIZE: int = _num_env("DB_POOL_SIZE", int, 16)
+    DB_MAX_OVERFLOW: int = _num_env("DB_MAX_OVERFLOW", int, 16)
 
     # ------- logging -----------------------------------------------
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -3666,6 +3669,8 @@ MIN_SOL_BALANCE = CFG.MIN_SOL_BALANCE
 
 # DB
 SQLITE_DB = CFG.SQLITE_DB
+DB_POOL_SIZE = CFG.DB_POOL_SIZE
+DB_MAX_OVERFLOW = CFG.DB_MAX_OVERFLOW
 DB_URI = f"sqlite+aiosqlite:///{pathlib.Path(SQLITE_DB).expanduser().resolve()}"
 
 # Riesgo/Exits
@@ -49,7 +49,7 @@ REPO_ROOT = PKG_ROOT.parent
 if str(REPO_ROOT) not in sys.path:    # garantiza import config
     sys.path.insert(0, str(REPO_ROOT))
 
-from config import SQLITE_DB          # type: ignore
+from config import SQLITE_DB, DB_POOL_SIZE, DB_MAX_OVERFLOW  # type: ignore
 from trade_pnl import apply_partial_fill, summarize_trade
 
 # ─────── ruta definitiva de la BD ───────
@@ -64,10 +64,15 @@ DB_PATH: Path = sqlite_path
 class Base(DeclarativeBase):  # type: ignore
     """Declarative base (async)."""
 
+# Pool dimensionado para evaluaciones concurrentes (una sesión por tarea);
+# pool_size conexiones se mantienen abiertas y reutilizadas tras el primer uso.
 engine: AsyncEngine = create_async_engine(
     f"sqlite+aiosqlite:///{DB_PATH.as_posix()}",
     echo=False,
     future=True,
+    pool_size=max(1, int(DB_POOL_SIZE)),
+    max_overflow=max(0, int(DB_MAX_OVERFLOW)),
+    pool_pre_ping=True,
 )
 
 SessionLocal = async_sessionmaker(
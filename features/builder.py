@@ -100,6 +100,8 @@ COLUMNS: list[str] = [
     "config_hash",
     "is_incomplete",
 ]
+# Índice inmutable compartido: evita reconstruir el Index (77 strings) por vector
+_COLUMNS_INDEX = pd.Index(COLUMNS)
 
 _BOOL_COLS = {
     "cluster_bad",
@@ -479,4 +481,4 @@ def build_feature_vector(tok: Dict[str, Any]) -> pd.Series:
 
     values["is_incomplete"] = int(token_is_incomplete(tok))
 
-    return pd.Series([values.get(c, np.nan) for c in COLUMNS], index=COLUMNS)
+    return pd.Series([values.get(c, np.nan) for c in COLUMNS], index=_COLUMNS_INDEX)
@@ -21,11 +21,26 @@ Persiste cada vector de features en un Parquet mensual
   las columnas actuales de `features.builder.COLUMNS`.
 • `append()` deja de rellenar vacíos con 0: usa `None` (→ null en Parquet)
   para mantener la semántica de *dato ausente* (coherente con NaN en pandas).
+
+🆕 Buffer de escritura
+─────────────────────
+• `append()` acumula filas en memoria; `flush()` las vuelca con un único
+  read+concat+write por Parquet mensual (antes: uno por fila).
+• Se vuelca al llegar a FEATURES_FLUSH_ROWS filas (en un hilo aparte: el
+  `append()` del event-loop nunca escribe), desde el loop principal
+  (periódico), antes de `update_pnl()`/`export_csv()` y al salir.
+• Un grupo cuyo `_write` falla vuelve a `_PENDING` y se reintenta.
+• Toda lectura-modificación-escritura del Parquet (`flush()`, `update_pnl()`,
+  `export_csv()`) va bajo `_FLUSH_LOCK`, y la escritura pasa por un fichero
+  temporal + `os.replace` (nunca se lee un Parquet a medio escribir).
 """
 from __future__ import annotations
 
+import atexit
 import datetime as dt
 import logging
+import os
+import threading
 from collections import OrderedDict
 from pathlib import Path
 from typing import Mapping
@@ -206,7 +221,18 @@ def _normalize_scalar(val: object) -> object:
 
 
 # ─────────── contador in-memory ───────────────────────────────
-_ROW_COUNT = 0  # se incrementa en cada append()
+_ROW_COUNT = 0  # se incrementa con cada fila escrita
+
+# ─────────── buffer de escritura ──────────────────────────────
+try:
+    _FLUSH_ROWS = max(1, int(os.getenv("FEATURES_FLUSH_ROWS", "50")))
+except Exception:
+    _FLUSH_ROWS = 50
+_PENDING: list[dict[str, object]] = []
+# flush() puede correr en un hilo; reentrante: update_pnl/export_csv llaman
+# a flush() con el lock ya tomado
+_FLUSH_LOCK = threading.RLock()
+_FLUSH_THREAD: threading.Thread | None = None
 
 # ───────────────────── low-level IO ───────────────────────────
 def _write(table: pa.Table, path: Path) -> None:
@@ -219,12 +245,14 @@ def _write(table: pa.Table, path: Path) -> None:
             promote_options="default",  # sin FutureWarning desde pyarrow 20
         )
 
-    pq.write_table(
-        table,
-        path,
-        compression="snappy",
-        use_deprecated_int96_timestamps=False,
-    )
+    _replace_table(table, path, use_deprecated_int96_timestamps=False)
+
+
+def _replace_table(table: pa.Table, path: Path, **kwargs: object) -> None:
+    """Escribe en un temporal del mismo directorio y lo renombra (atómico)."""
+    tmp = path.with_name(path.name + ".tmp")
+    pq.write_table(table, tmp, compression="snappy", **kwargs)
+    os.replace(tmp, path)
 
 
 # ───────────────────── API pública ─────────────────────────────
@@ -236,7 +264,8 @@ def append(
     sample_type: str | None = None,
 ) -> None:
     """
-    Añade una fila al Parquet mensual y muestra el total cada 100 filas.
+    Añade una fila al buffer en memoria; se escribe en el Parquet mensual en
+    el siguiente `flush()` (en un hilo al llegar a FEATURES_FLUSH_ROWS).
     - No rellena con 0: usa None para preservar la semántica de 'dato ausente'.
     """
     global _ROW_COUNT
@@ -259,19 +288,78 @@ def append(
     row["sample_type"] = normalize_sample_type(sample_type)
     row["ts"] = dt.datetime.now(dt.timezone.utc)
 
-    pa_table = pa.Table.from_pydict({k: [v] for k, v in row.items()})
+    _PENDING.append(row)
+    if len(_PENDING) >= _FLUSH_ROWS:
+        _flush_in_background()
+
+
+def _flush_in_background() -> None:
+    """Lanza `flush()` en un hilo si no hay ya uno en marcha (no bloquea)."""
+    global _FLUSH_THREAD
+
+    if _FLUSH_THREAD is not None and _FLUSH_THREAD.is_alive():
+        return
+    _FLUSH_THREAD = threading.Thread(target=flush, name="features-flush", daemon=True)
+    _FLUSH_THREAD.start()
 
+
+def _rows_to_table(rows: list[dict[str, object]]) -> pa.Table:
     try:
-        _write(pa_table, _file_for_now())
-        _ROW_COUNT += 1
-        if _ROW_COUNT % 100 == 0:
+        return pa.Table.from_pylist(rows)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # tipos mezclados en alguna columna: fila a fila, como antes
+        return pa.concat_tables(
+            [_enforce_schema(pa.Table.from_pydict({k: [v] for k, v in r.items()})) for r in rows]
+        )
+
+
+def flush() -> int:
+    """
+    Escribe las filas pendientes (un read+write por fichero mensual).
+    Devuelve cuántas filas se escribieron.
+    """
+    global _ROW_COUNT
+
+    with _FLUSH_LOCK:
+        if not _PENDING:
+            return 0
+        rows = list(_PENDING)
+        del _PENDING[: len(rows)]
+
+        by_path: dict[Path, list[dict[str, object]]] = {}
+        for row in rows:
+            by_path.setdefault(_file_for_now(row["ts"]), []).append(row)  # type: ignore[arg-type]
+
+        written = 0
+        failed: list[dict[str, object]] = []
+        for path, group in by_path.items():
+            try:
+                _write(_rows_to_table(group), path)
+                written += len(group)
+            except Exception as exc:  # noqa: BLE001
+                log.error("Parquet append error (%d filas, se reintentan) → %s", len(group), exc)
+                failed.extend(group)
+        if failed:
+            _PENDING[:0] = failed  # delante de lo añadido mientras se escribía
+
+        before = _ROW_COUNT
+        _ROW_COUNT += written
+        if _ROW_COUNT // 100 > before // 100:
             log.info("Features acumuladas: %s", _ROW_COUNT)
-    except Exception as exc:  # noqa: BLE001
-        log.error("Parquet append error → %s", exc)
+        return written
+
+
+atexit.register(flush)
 
 
 def update_pnl(address: str, pnl_pct: float) -> None:
     """Legacy helper: actualiza pnl_pct y target_total_pnl_pct en la última fila del token."""
+    with _FLUSH_LOCK:
+        flush()
+        _update_pnl_locked(address, pnl_pct)
+
+
+def _update_pnl_locked(address: str, pnl_pct: float) -> None:
     path = _file_for_now()
     if not path.exists():
         return
@@ -304,19 +392,26 @@ def update_pnl(address: str, pnl_pct: float) -> None:
             "target_total_pnl_pct",
             pa.array(target_vals),
         )
-        pq.write_table(new_table, path, compression="snappy")
+        _replace_table(new_table, path)
     except Exception as exc:  # noqa: BLE001
         log.error("update_pnl error → %s", exc)
 
 
 def export_csv() -> None:
     """Vuelca el Parquet actual a CSV para inspección offline."""
-    path = _file_for_now()
-    if not path.exists():
-        return
+    with _FLUSH_LOCK:
+        flush()
+        path = _file_for_now()
+        if not path.exists():
+            return
+        try:
+            table = pq.read_table(path)
+        except Exception as exc:  # noqa: BLE001
+            log.error("export_csv error → %s", exc)
+            return
+    # la lectura ya es una copia: el CSV se escribe sin retener el lock
     csv_path = path.with_suffix(".csv")
     try:
-        table = pq.read_table(path)
         df = table.to_pandas()
         df.to_csv(csv_path, index=False)
     except Exception as exc:  # noqa: BLE001
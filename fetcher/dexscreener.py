@@ -43,6 +43,7 @@ import aiohttp
 import numpy as np
 
 from config import DEX_API_BASE
+from utils.http import get_session
 from utils.data_utils import sanitize_token_data
 from utils.simple_cache import cache_get, cache_set
 from utils.time import parse_iso_utc  # ← usar helper seguro para ISO
@@ -349,59 +350,59 @@ async def get_pair(address: str) -> Optional[Dict[str, Any]]:
     if hit is not None:
         return None if hit is _SENTINEL_NIL else hit
 
-    async with aiohttp.ClientSession() as s:
-        # ① tokens (mint → lista de pares)
-        url_tokens = _u("latest/dex/tokens", address)
-        raw_tok = await _fetch_json(url_tokens, s)
-        if raw_tok:
-            log.debug("[DEX] %s tokens→ %s", address[:6], list(raw_tok.keys())[:3])
-        if isinstance(raw_tok, dict) and raw_tok.get("pairs"):
-            pair = _pick_best_pair(raw_tok["pairs"])
+    s = get_session()  # pool keep-alive compartido (utils.http)
+    # ① tokens (mint → lista de pares)
+    url_tokens = _u("latest/dex/tokens", address)
+    raw_tok = await _fetch_json(url_tokens, s)
+    if raw_tok:
+        log.debug("[DEX] %s tokens→ %s", address[:6], list(raw_tok.keys())[:3])
+    if isinstance(raw_tok, dict) and raw_tok.get("pairs"):
+        pair = _pick_best_pair(raw_tok["pairs"])
+        if pair:
+            res = _norm_from_pair(pair)
+            if res.get("address"):
+                log.debug("[DEX] %s ✅ tokens-hit (mint)", address[:6])
+                cache_set(ck, res, ttl=_CACHE_TTL_OK)
+                _fail_count.pop(address, None)
+                return res
+
+    # ② pairs (pairAddress directo)
+    url_pair = _u("latest/dex/pairs/solana", address)
+    raw_pair = await _fetch_json(url_pair, s)
+    if raw_pair:
+        log.debug("[DEX] %s pairs→ %s", address[:6], list(raw_pair.keys())[:3])
+    if isinstance(raw_pair, dict):
+        if raw_pair.get("pair"):
+            res = _norm_from_pair(raw_pair["pair"])
+            if res.get("address"):
+                log.debug("[DEX] %s ✅ pair-hit (direct)", address[:6])
+                cache_set(ck, res, ttl=_CACHE_TTL_OK)
+                _fail_count.pop(address, None)
+                return res
+        if raw_pair.get("pairs"):
+            pair = _pick_best_pair(raw_pair["pairs"])
             if pair:
                 res = _norm_from_pair(pair)
                 if res.get("address"):
-                    log.debug("[DEX] %s ✅ tokens-hit (mint)", address[:6])
+                    log.debug("[DEX] %s ✅ pair-hit (list)", address[:6])
                     cache_set(ck, res, ttl=_CACHE_TTL_OK)
                     _fail_count.pop(address, None)
                     return res
 
-        # ② pairs (pairAddress directo)
-        url_pair = _u("latest/dex/pairs/solana", address)
-        raw_pair = await _fetch_json(url_pair, s)
-        if raw_pair:
-            log.debug("[DEX] %s pairs→ %s", address[:6], list(raw_pair.keys())[:3])
-        if isinstance(raw_pair, dict):
-            if raw_pair.get("pair"):
-                res = _norm_from_pair(raw_pair["pair"])
-                if res.get("address"):
-                    log.debug("[DEX] %s ✅ pair-hit (direct)", address[:6])
-                    cache_set(ck, res, ttl=_CACHE_TTL_OK)
-                    _fail_count.pop(address, None)
-                    return res
-            if raw_pair.get("pairs"):
-                pair = _pick_best_pair(raw_pair["pairs"])
-                if pair:
-                    res = _norm_from_pair(pair)
-                    if res.get("address"):
-                        log.debug("[DEX] %s ✅ pair-hit (list)", address[:6])
-                        cache_set(ck, res, ttl=_CACHE_TTL_OK)
-                        _fail_count.pop(address, None)
-                        return res
-
-        # ③ fallback search
-        url_search = _u("latest/dex/search")
-        raw_search = await _fetch_json(url_search, s, params={"q": address})
-        if raw_search:
-            log.debug("[DEX] %s search→ %s", address[:6], list(raw_search.keys())[:3])
-        if isinstance(raw_search, dict) and raw_search.get("pairs"):
-            pair = _pick_best_pair(raw_search["pairs"])
-            if pair:
-                res = _norm_from_pair(pair)
-                if res.get("address"):
-                    log.debug("[DEX] %s ✅ search-hit", address[:6])
-                    cache_set(ck, res, ttl=_CACHE_TTL_OK)
-                    _fail_count.pop(address, None)
-                    return res
+    # ③ fallback search
+    url_search = _u("latest/dex/search")
+    raw_search = await _fetch_json(url_search, s, params={"q": address})
+    if raw_search:
+        log.debug("[DEX] %s search→ %s", address[:6], list(raw_search.keys())[:3])
+    if isinstance(raw_search, dict) and raw_search.get("pairs"):
+        pair = _pick_best_pair(raw_search["pairs"])
+        if pair:
+            res = _norm_from_pair(pair)
+            if res.get("address"):
+                log.debug("[DEX] %s ✅ search-hit", address[:6])
+                cache_set(ck, res, ttl=_CACHE_TTL_OK)
+                _fail_count.pop(address, None)
+                return res
 
     # si llega aquí, no hubo datos
     fails = _fail_count.get(address, 0) + 1
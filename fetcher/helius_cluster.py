@@ -10,6 +10,7 @@ from typing import Any, Dict
 import aiohttp
 
 from config import HELIUS_RPC_URL, HELIUS_API_KEY
+from utils.http import get_session
 from utils.simple_cache import cache_get, cache_set
 
 MAX_SHARE_TOP10 = 0.20
@@ -31,17 +32,16 @@ async def _rpc(method: str, params: list[Any]) -> Dict | None:
 
     for attempt in range(_MAX_TRIES):
         try:
-            async with aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=TIMEOUT)
-            ) as s:
-                async with s.post(HELIUS_RPC_URL, json=payload) as r:
-                    if r.status in {429, 500, 502, 503, 504}:
-                        raise aiohttp.ClientResponseError(r.request_info, (), status=r.status)
-                    if r.status != 200:
-                        log.debug("[Helius] %s", await r.text())
-                        return None
-                    data = await r.json()
-                    return data.get("result")
+            async with get_session().post(
+                HELIUS_RPC_URL, json=payload, timeout=aiohttp.ClientTimeout(total=TIMEOUT)
+            ) as r:
+                if r.status in {429, 500, 502, 503, 504}:
+                    raise aiohttp.ClientResponseError(r.request_info, (), status=r.status)
+                if r.status != 200:
+                    log.debug("[Helius] %s", await r.text())
+                    return None
+                data = await r.json()
+                return data.get("result")
         except Exception as e:  # noqa: BLE001
             log.debug("[Helius] %s (try %s/%s)", e, attempt + 1, _MAX_TRIES)
             if attempt < _MAX_TRIES - 1:
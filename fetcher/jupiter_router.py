@@ -10,6 +10,8 @@ import os
 from dataclasses import dataclass
 from typing import Any, Dict, Optional, Mapping, Union
 
+from utils.http import get_session
+
 log = logging.getLogger("jupiter_router")
 
 # ───────────────────────── Config ─────────────────────────
@@ -353,20 +355,19 @@ async def get_quote(
 
     async def _do(url: str) -> QuoteResult:
         try:
-            async with aiohttp.ClientSession(timeout=timeout, headers=_headers()) as sess:
-                async with sess.get(url, params=params) as resp:
-                    if resp.status != 200:
-                        body: Any = None
+            async with get_session().get(url, params=params, timeout=timeout, headers=_headers()) as resp:
+                if resp.status != 200:
+                    body: Any = None
+                    try:
+                        body = await resp.json(content_type=None)
+                    except Exception:
                         try:
-                            body = await resp.json(content_type=None)
+                            body = await resp.text()
                         except Exception:
-                            try:
-                                body = await resp.text()
-                            except Exception:
-                                body = None
-                        log.debug("[jupiter_router] quote non-200 (%s) url=%s body=%s", resp.status, url, body)
-                        return QuoteResult(False, None, None, None, {"status": resp.status}, {"status": resp.status, "body": body})
-                    data = await resp.json(content_type=None)
+                            body = None
+                    log.debug("[jupiter_router] quote non-200 (%s) url=%s body=%s", resp.status, url, body)
+                    return QuoteResult(False, None, None, None, {"status": resp.status}, {"status": resp.status, "body": body})
+                data = await resp.json(content_type=None)
         except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             log.debug("[jupiter_router] quote HTTP error url=%s: %s", url, e)
             return QuoteResult(False, None, None, None, {"error": str(e)}, {"error": str(e)})
@@ -454,12 +455,11 @@ async def get_order(
     )
     timeout = aiohttp.ClientTimeout(total=TIMEOUT_S)
 
-    async with aiohttp.ClientSession(timeout=timeout, headers=_headers()) as sess:
-        async with sess.get(JUP_ORDER_URL, params=params) as resp:
-            if resp.status != 200:
-                body = await resp.text()
-                raise RuntimeError(f"Jupiter order non-200 ({resp.status}) body={body}")
-            data = await resp.json(content_type=None)
+    async with get_session().get(JUP_ORDER_URL, params=params, timeout=timeout, headers=_headers()) as resp:
+        if resp.status != 200:
+            body = await resp.text()
+            raise RuntimeError(f"Jupiter order non-200 ({resp.status}) body={body}")
+        data = await resp.json(content_type=None)
 
     tx_b64 = data.get("transaction")
     request_id = data.get("requestId")
@@ -482,12 +482,11 @@ async def execute_order(*, signed_transaction: str, request_id: str) -> Dict[str
         "requestId": request_id,
     }
     timeout = aiohttp.ClientTimeout(total=SWAP_TIMEOUT_S)
-    async with aiohttp.ClientSession(timeout=timeout, headers=_headers()) as sess:
-        async with sess.post(JUP_EXECUTE_URL, json=payload) as resp:
-            if resp.status != 200:
-                body = await resp.text()
-                raise RuntimeError(f"Jupiter execute non-200 ({resp.status}) body={body}")
-            return await resp.json(content_type=None)
+    async with get_session().post(JUP_EXECUTE_URL, json=payload, timeout=timeout, headers=_headers()) as resp:
+        if resp.status != 200:
+            body = await resp.text()
+            raise RuntimeError(f"Jupiter execute non-200 ({resp.status}) body={body}")
+        return await resp.json(content_type=None)
 
 
 async def execute_managed_swap(
@@ -640,26 +639,25 @@ async def execute_swap(
     last_err: Optional[str] = None
     for attempt in range(max(1, int(max_retries)) + 1):
         try:
-            async with aiohttp.ClientSession(timeout=timeout, headers=_headers()) as sess:
-                async with sess.post(swap_url, json=payload) as resp:
-                    if resp.status != 200:
-                        body: Any = None
+            async with get_session().post(swap_url, json=payload, timeout=timeout, headers=_headers()) as resp:
+                if resp.status != 200:
+                    body: Any = None
+                    try:
+                        body = await resp.json(content_type=None)
+                    except Exception:
                         try:
-                            body = await resp.json(content_type=None)
+                            body = await resp.text()
                         except Exception:
-                            try:
-                                body = await resp.text()
-                            except Exception:
-                                body = None
-                        last_err = f"swap non-200 ({resp.status}) body={body}"
-                        log.debug("[jupiter_router] %s url=%s", last_err, swap_url)
-                        # retry suave en 429/5xx
-                        if resp.status in (429, 500, 502, 503, 504) and attempt <= max_retries:
-                            await asyncio.sleep(0.6 * attempt)
-                            continue
-                        raise RuntimeError(last_err)
-
-                    data = await resp.json(content_type=None)
+                            body = None
+                    last_err = f"swap non-200 ({resp.status}) body={body}"
+                    log.debug("[jupiter_router] %s url=%s", last_err, swap_url)
+                    # retry suave en 429/5xx
+                    if resp.status in (429, 500, 502, 503, 504) and attempt <= max_retries:
+                        await asyncio.sleep(0.6 * attempt)
+                        continue
+                    raise RuntimeError(last_err)
+
+                data = await resp.json(content_type=None)
 
             # Jupiter suele devolver swapTransaction en base64
             tx_b64 = (
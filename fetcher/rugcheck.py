@@ -6,6 +6,7 @@ import aiohttp
 import tenacity
 
 from config import RUGCHECK_API_BASE, RUGCHECK_API_KEY
+from utils.http import get_session
 from utils.simple_cache import cache_get, cache_set
 
 log = logging.getLogger("rugcheck")
@@ -28,12 +29,11 @@ else:
     @tenacity.retry(wait=tenacity.wait_fixed(2), stop=tenacity.stop_after_attempt(3))
     async def _fetch_score(address: str) -> int | None:
         url = f"{RUGCHECK_API_BASE.rstrip('/')}/score/{address}"
-        async with aiohttp.ClientSession() as sess:
-            async with sess.get(url, headers=HEADERS, timeout=10) as resp:
-                if resp.status == 404:
-                    return None
-                resp.raise_for_status()
-                data = await resp.json()
+        async with get_session().get(url, headers=HEADERS, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            if resp.status == 404:
+                return None
+            resp.raise_for_status()
+            data = await resp.json()
         score = data.get("score")
         return None if score is None else int(score)
 
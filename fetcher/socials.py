@@ -13,6 +13,7 @@ from analytics.social_signal import (
 )
 from config import DEX_API_BASE
 from config.config import CFG
+from utils.http import get_session
 from utils.simple_cache import cache_get, cache_set
 
 log = logging.getLogger("socials")
@@ -38,7 +39,7 @@ async def fetch_social_profile(address: str) -> SocialSignal:
     started = time.perf_counter()
     timeout_s = float(getattr(CFG, "SOCIALS_TIMEOUT_S", 2.0) or 2.0)
     try:
-        async with aiohttp.ClientSession() as sess, sess.get(url, timeout=timeout_s) as resp:
+        async with get_session().get(url, timeout=aiohttp.ClientTimeout(total=timeout_s)) as resp:
             latency_ms = int((time.perf_counter() - started) * 1000)
             if resp.status != 200:
                 signal = unknown_social_signal(source="dexscreener", latency_ms=latency_ms)
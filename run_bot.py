@@ -40,28 +40,32 @@ from __future__ import annotations
 # ───────── stdlib ────────────────────────────────────────────────────────────
 import argparse
 import asyncio
+import calendar
+import contextvars
 import datetime as dt
+import functools
 import hashlib
 import json
 import logging
 import math
 import os
 import random
+import re
 import socket
 import sys
 import time
-from collections import deque
+from collections import Counter
 from types import SimpleNamespace
-from typing import Sequence, Dict, List, Tuple, Optional
+from typing import Any, Sequence, Dict, List, Tuple, Optional
+
+import numpy as np
 
 # ----------------------------------------------------------------------------
 # Helper de formato “seguro” para logs debug
 # ----------------------------------------------------------------------------
 def _fmt(val, pattern: str = "{:.1f}") -> str:
     """Convierte números a str de forma robusta (None/NaN → '?')."""
-    if val is None:
-        return "?"
-    if isinstance(val, float) and math.isnan(val):
+    if val is None or (isinstance(val, float) and val != val):  # None / NaN
         return "?"
     try:
         return pattern.format(val)
@@ -86,8 +90,10 @@ logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
 
 # ───────── SQLAlchemy (async) ────────────────────────────────────────────────
 from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import raiseload
 
 # ───────── Config & exits ───────────────────────────────────────────────────
 from config.config import (  # noqa: E402 – after stdlib
@@ -108,6 +114,8 @@ from config.config import (  # noqa: E402 – after stdlib
     BUY_RATE_LIMIT_WINDOW_S,
 )
 from config import exits  # take-profit / stop-loss
+from utils import http as http_pool  # noqa: E402 – keep-alive compartido
+from utils._njit import njit  # noqa: E402 – JIT opcional (numba)
 
 MIN_MARKET_CAP_USD = CFG.MIN_MARKET_CAP_USD
 MAX_MARKET_CAP_USD = CFG.MAX_MARKET_CAP_USD
@@ -116,6 +124,10 @@ BUY_SOFT_SCORE_MIN = CFG.BUY_SOFT_SCORE_MIN  # nuevo
 # ───────── DB & modelos ─────────────────────────────────────────────────────
 from db.database import SessionLocal, async_init_db  # noqa: E402
 from db.models import Position, Token  # noqa: E402
+
+# Columnas persistibles de Token (metadata estática del mapper)
+_TOKEN_COLS = frozenset(c.key for c in inspect(Token).mapper.column_attrs)
+
 from runtime.command_bus import (  # noqa: E402
     DEFAULT_BOT_ID as CONTROL_DEFAULT_BOT_ID,
     STATUS_DONE as COMMAND_STATUS_DONE,
@@ -209,6 +221,7 @@ from features.store import (  # noqa: E402
     append as store_append,
     update_pnl as store_update_pnl,
     export_csv as store_export_csv,
+    flush as store_flush,
 )
 from ml.retrain import retrain_if_better  # noqa: E402
 
@@ -277,39 +290,13 @@ def _parse_hours(spec: str) -> List[Tuple[int, int]]:
                 continue
     return sorted(windows)
 
-def _in_ranges(now_local: dt.datetime, ranges: List[Tuple[int, int]]) -> bool:
-    if not ranges:
-        return False
-    h = now_local.hour
+def _hours_mask(ranges: List[Tuple[int, int]]) -> int:
+    """Bitmap de 24 bits: bit h a 1 si la hora h cae en algún rango."""
+    mask = 0
     for a, b in ranges:
-        if a <= h <= b:
-            return True
-    return False
-
-def _in_windows(now_local: dt.datetime, windows: List[Tuple[int, int]]) -> bool:
-    if not windows:
-        return True
-    h = now_local.hour
-    for a, b in windows:
-        if a <= h <= b:
-            return True
-    return False
-
-def _secs_to_next_window(now_local: dt.datetime, windows: List[Tuple[int, int]]) -> int:
-    if not windows:
-        return 0
-    h, m, s = now_local.hour, now_local.minute, now_local.second
-    if _in_windows(now_local, windows):
-        return 15 * 60  # estamos dentro; reintento “suave”
-    candidates: List[int] = []
-    for a, _ in windows:
-        if a >= h:
-            delta = (a - h) * 3600 - m * 60 - s
-            candidates.append(delta if delta >= 0 else 0)
-        else:
-            delta = (24 - h + a) * 3600 - m * 60 - s
-            candidates.append(delta)
-    return min(candidates) if candidates else 3600
+        for h in range(a, b + 1):
+            mask |= 1 << h
+    return mask
 
 # Ventanas permitidas
 _TRADING_HOURS       = _parse_hours(os.getenv("TRADING_HOURS", ""))
@@ -320,66 +307,110 @@ _BLOCK_HOURS         = _parse_hours(os.getenv("BLOCK_HOURS", ""))
 
 _REQUIRE_JUP_FOR_BUY = os.getenv("REQUIRE_JUPITER_FOR_BUY", "true").lower() == "true"
 
+# Horas operables precalculadas: (ventanas o 24h) menos bloqueos → test O(1)
+_ALL_HOURS_MASK   = (1 << 24) - 1
+_HOURS_MASK_BASE  = _hours_mask(_TRADING_HOURS)
+_HOURS_MASK_FULL  = _HOURS_MASK_BASE | _hours_mask(_TRADING_HOURS_EXTRA)
+_WINDOW_MASK      = (_HOURS_MASK_FULL if _USE_EXTRA_HOURS else _HOURS_MASK_BASE) or _ALL_HOURS_MASK
+_BLOCK_MASK       = _hours_mask(_BLOCK_HOURS)
+_TRADING_MASK     = _WINDOW_MASK & ~_BLOCK_MASK & _ALL_HOURS_MASK
+# False → 24/7 sin bloqueos: el gate horario ni se evalúa
+_HAS_WINDOWS      = _TRADING_MASK != _ALL_HOURS_MASK
+# Tablas planas por hora (bytes de 24): el hot path hace un solo índice
+_HOUR_ALLOWED     = bytes((_TRADING_MASK >> h) & 1 for h in range(24))
+_HOUR_BLOCKED     = bytes((_BLOCK_MASK >> h) & 1 for h in range(24))
+# _NEXT_ACTIVE[h] → horas hasta el próximo inicio de hora operable (1..24; None si ninguna)
+_NEXT_ACTIVE: List[Optional[int]] = [
+    next((k for k in range(1, 25) if _HOUR_ALLOWED[(h + k) % 24]), None)
+    for h in range(24)
+]
+
+# Veredicto de la hora en curso: solo cambia en el cambio de hora local
+_WINDOW_CACHE: Dict[str, Any] = {"until": 0.0, "allowed": True}
+
 def _in_trading_window(now_local: Optional[dt.datetime] = None) -> bool:
     """True si (ventanas vacías o dentro de ventanas) y NO en horas bloqueadas."""
-    now_local = now_local or dt.datetime.now()
-    windows = list(_TRADING_HOURS)
-    if _USE_EXTRA_HOURS:
-        windows += list(_TRADING_HOURS_EXTRA)
-    allowed_by_window = _in_windows(now_local, windows) if windows else True
-    blocked = _in_ranges(now_local, _BLOCK_HOURS) if _BLOCK_HOURS else False
-    return allowed_by_window and not blocked
+    if not _HAS_WINDOWS:
+        return True
+    if now_local is not None:
+        return bool(_HOUR_ALLOWED[now_local.hour])
+    t = time.time()
+    if t < _WINDOW_CACHE["until"]:
+        return _WINDOW_CACHE["allowed"]
+    now_local = dt.datetime.fromtimestamp(t)
+    allowed = bool(_HOUR_ALLOWED[now_local.hour])
+    _WINDOW_CACHE["allowed"] = allowed
+    _WINDOW_CACHE["until"] = t + 3600 - now_local.minute * 60 - now_local.second - now_local.microsecond / 1e6
+    return allowed
 
 def _delay_until_window(now_local: Optional[dt.datetime] = None) -> int:
     """
     Segundos hasta la próxima franja permitida (considera ventanas y bloqueos).
-    Si ya está permitido, devuelve 0. Busca al siguiente “inicio de hora”.
+    Si ya está permitido, devuelve 0. Apunta al siguiente “inicio de hora”.
     """
     now_local = now_local or dt.datetime.now()
     if _in_trading_window(now_local):
         return 0
+    hours_ahead = _NEXT_ACTIVE[now_local.hour]
+    if hours_ahead is None:
+        return 15 * 60  # todas las horas bloqueadas
+    delta = hours_ahead * 3600 - now_local.minute * 60 - now_local.second - now_local.microsecond / 1e6
+    return int(max(30, delta))
+
 
-    windows = list(_TRADING_HOURS)
-    if _USE_EXTRA_HOURS:
-        windows += list(_TRADING_HOURS_EXTRA)
+# ╭─────────────────────── Rate limiter de BUY ───────────────────────────────╮
+# Firmas explícitas → numba compila (o carga de caché) al importar, no en el
+# primer BUY / primer candidato Pump.fun.
+# Tiempos en ns enteros (time.monotonic_ns): comparaciones int64, sin floats.
+_SIG_BUCKET_ALLOW = "Tuple((int64, int64, boolean))(int64[:], int64, int64, int64, int64, int64)"
+_SIG_PF_TRY_CORE = (
+    "Tuple((int64, int64, boolean))"
+    "(int64[:], int64[:], int64[:], int64, int64, int64, int64, int64, int64)"
+)
+_NS = 1_000_000_000
 
-    base = now_local.replace(minute=0, second=0, microsecond=0)
-    # Buscamos en los próximos 48 saltos horarios una hora permitida
-    for i in range(0, 48):
-        # si ya estamos en xx:00 exacto, el siguiente turno es +0, si no, +1
-        cand = base + dt.timedelta(hours=i + (0 if now_local == base else 1))
-        ok_window = _in_windows(cand, windows) if windows else True
-        blocked = _in_ranges(cand, _BLOCK_HOURS) if _BLOCK_HOURS else False
-        if ok_window and not blocked:
-            delta = (cand - now_local).total_seconds()
-            return int(max(30, delta))
-    return 15 * 60  # fallback improbable
+
+@njit(_SIG_BUCKET_ALLOW, cache=True)
+def _bucket_allow(ts, head, count, window_ns, now, n):
+    """
+    Kernel del leaky-bucket sobre un ring-buffer int64 (ns) de capacidad fija
+    (= max_hits): purga lo caducado y, si caben `n` hits, los apunta.
+    Devuelve (head, count, concedido). Con n=0 solo purga.
+    """
+    cap = ts.shape[0]
+    while count > 0 and now - ts[head] > window_ns:
+        head = (head + 1) % cap
+        count -= 1
+    if count + n > cap:
+        return head, count, False
+    for _ in range(n):
+        ts[(head + count) % cap] = now
+        count += 1
+    return head, count, True
 
 
-# ╭─────────────────────── Rate limiter de BUY ───────────────────────────────╮
 class _BuyLimiter:
     """Leaky-bucket simple no bloqueante para BUY."""
     def __init__(self, max_hits: int, window_s: int):
         self.max_hits = max(1, int(max_hits))
         self.window_s = max(1, int(window_s))
-        self._ts = deque()  # timestamps monotonic de BUYs concedidos
+        self._window_ns = self.window_s * _NS
+        # timestamps monotonic_ns de BUYs concedidos (ring-buffer, sin realocar)
+        self._ts = np.zeros(self.max_hits, dtype=np.int64)
+        self._head = 0
+        self._count = 0
 
     def allow(self, n: int = 1) -> bool:
-        now = time.monotonic()
-        # purge fuera de ventana
-        while self._ts and now - self._ts[0] > self.window_s:
-            self._ts.popleft()
-        if len(self._ts) + n <= self.max_hits:
-            for _ in range(n):
-                self._ts.append(now)
-            return True
-        return False
+        self._head, self._count, granted = _bucket_allow(
+            self._ts, self._head, self._count, self._window_ns, time.monotonic_ns(), int(n)
+        )
+        return bool(granted)
 
     def current(self) -> int:
-        now = time.monotonic()
-        while self._ts and now - self._ts[0] > self.window_s:
-            self._ts.popleft()
-        return len(self._ts)
+        self._head, self._count, _ = _bucket_allow(
+            self._ts, self._head, self._count, self._window_ns, time.monotonic_ns(), 0
+        )
+        return int(self._count)
 
 _BUY_LIMITER = _BuyLimiter(BUY_RATE_LIMIT_N, BUY_RATE_LIMIT_WINDOW_S)
 
@@ -573,6 +604,52 @@ try:
     EVALUATE_TOKEN_TIMEOUT_S = max(0.0, float(os.getenv("EVALUATE_TOKEN_TIMEOUT_S", "120")))
 except Exception:
     EVALUATE_TOKEN_TIMEOUT_S = 120.0
+try:
+    JUP_ROUTE_PROBE_TIMEOUT_S = max(0.1, float(os.getenv("JUP_ROUTE_PROBE_TIMEOUT_S", "2.0")))
+except Exception:
+    JUP_ROUTE_PROBE_TIMEOUT_S = 2.0
+try:
+    EVAL_CONCURRENCY = max(1, int(float(os.getenv("EVAL_CONCURRENCY", "8"))))
+except Exception:
+    EVAL_CONCURRENCY = 8
+try:
+    VALIDATION_CONCURRENCY = max(1, int(float(os.getenv("VALIDATION_CONCURRENCY", "5"))))
+except Exception:
+    VALIDATION_CONCURRENCY = 5
+try:
+    SELL_CONCURRENCY = max(1, int(float(os.getenv("SELL_CONCURRENCY", "4"))))
+except Exception:
+    SELL_CONCURRENCY = 4
+# ── sonda de bloqueos del event-loop (opt-in, solo diagnóstico) ─────────
+#    MEMEBOT_PROFILE=1 → modo debug de asyncio: avisa de todo callback/paso de
+#    corrutina que retenga el loop más de LOOP_SLOW_CALLBACK_S.
+_LOOP_PROFILE = os.getenv("MEMEBOT_PROFILE", "").strip().lower() in ("1", "true", "yes")
+try:
+    LOOP_SLOW_CALLBACK_S = max(0.001, float(os.getenv("LOOP_SLOW_CALLBACK_S", "0.1")))
+except Exception:
+    LOOP_SLOW_CALLBACK_S = 0.1
+# ── límites de sondeo crítico por ciclo (monitor) ───────────────────────
+try:
+    _CRIT_MAX = max(int(os.getenv("CRIT_PRICE_MAX_PER_CYCLE", "4")), 0)
+except Exception:
+    _CRIT_MAX = 4
+try:
+    _CRIT_BOOTSTRAP_MIN = max(int(os.getenv("CRIT_BOOTSTRAP_MIN", "20")), 0)
+except Exception:
+    _CRIT_BOOTSTRAP_MIN = 20
+try:
+    MONITOR_PRICE_CONCURRENCY = max(1, int(float(os.getenv("MONITOR_PRICE_CONCURRENCY", "8"))))
+except Exception:
+    MONITOR_PRICE_CONCURRENCY = 8
+# Tope del backoff ocioso: por defecto 3×SLEEP_SECONDS, porque un token nuevo
+# del stream Pump.fun puede esperar hasta este sleep antes de evaluarse.
+try:
+    IDLE_SLEEP_MAX_S = max(
+        float(SLEEP_SECONDS),
+        float(os.getenv("IDLE_SLEEP_MAX_S") or 3.0 * float(SLEEP_SECONDS)),
+    )
+except Exception:
+    IDLE_SLEEP_MAX_S = 3.0 * float(SLEEP_SECONDS)
 
 TP_PCT        = exits.TAKE_PROFIT_PCT
 SL_PCT        = exits.STOP_LOSS_PCT
@@ -585,6 +662,12 @@ AI_THRESHOLD         = AI_TH_CFG  # usar AI_TH nuevo por defecto; puede sobreesc
 _EARLY_DROP_PCT = float(CFG.EARLY_DROP_KILL_PCT or 0.0)
 _EARLY_WINDOW_S = int(max(0.0, float(CFG.EARLY_DROP_WINDOW_MIN or 0.0)) * 60.0)
 _LIQ_CRUSH_FRAC = float(CFG.KILL_LIQ_FRACTION or 0.0)
+# ¿Alguna regla de salida usa la liquidez actual? Si no, el monitor ni la pide.
+_MONITOR_NEEDS_LIQ = (
+    _LIQ_CRUSH_FRAC > 0
+    or float(CFG.LIQ_CRUSH_DROP_PCT or 0.0) > 0
+    or (float(getattr(CFG, "MIN_LIQUIDITY_USD", 0.0) or 0.0) > 0 and float(CFG.LIQ_CRUSH_ABS_FRACT or 0.0) > 0)
+)
 TP_PARTIAL_ENABLED = bool(CFG.TP_PARTIAL_ENABLED)
 TP_PARTIAL_FRACTION = max(0.05, min(0.95, float(CFG.TP_PARTIAL_FRACTION or 0.40)))
 TP_PARTIAL_MIN_REMAIN_LAMPORTS = max(0, int(CFG.TP_PARTIAL_MIN_REMAIN_LAMPORTS or 1))
@@ -597,6 +680,21 @@ TIME_STOP_MAX_PNL_PCT = float(CFG.TIME_STOP_MAX_PNL_PCT or 0.0)
 TIME_STOP_MIN_PEAK_PCT = float(CFG.TIME_STOP_MIN_PEAK_PCT or 0.0)
 
 # ╭─────────────────────── Carga de AI_THRESHOLD recomendado ─────────────────╮
+_JSON_MTIME_CACHE: Dict[str, Tuple[int, Any]] = {}  # path → (st_mtime_ns, json)
+
+
+def _read_json_cached(path) -> Any:
+    """json.loads(path) memoizado por st_mtime_ns (FileNotFoundError si no existe)."""
+    st = path.stat()
+    key = str(path)
+    hit = _JSON_MTIME_CACHE.get(key)
+    if hit is not None and hit[0] == st.st_mtime_ns:
+        return hit[1]
+    data = json.loads(path.read_bytes())
+    _JSON_MTIME_CACHE[key] = (st.st_mtime_ns, data)
+    return data
+
+
 def _load_ai_threshold_override() -> Optional[float]:
     """
     Intenta leer:
@@ -616,22 +714,24 @@ def _load_ai_threshold_override() -> Optional[float]:
     try:
         metrics_dir = CFG.FEATURES_DIR.parent / "metrics"
         thr_path = metrics_dir / "recommended_threshold.json"
-        if thr_path.exists():
-            data = json.loads(thr_path.read_text())
-            val = _extract_ready_threshold(data, "picked")
-            if val is not None:
-                return val
+        data = _read_json_cached(thr_path)  # re-parsea solo si cambia el mtime
+        val = _extract_ready_threshold(data, "picked")
+        if val is not None:
+            return val
+    except FileNotFoundError:
+        pass
     except Exception:
         pass
 
     # 2) meta del modelo
     try:
         meta_path = CFG.MODEL_PATH.with_suffix(".meta.json")
-        if meta_path.exists():
-            meta = json.loads(meta_path.read_text())
-            val = _extract_ready_threshold(meta, "ai_threshold_recommended", "threshold")
-            if val is not None:
-                return val
+        meta = _read_json_cached(meta_path)
+        val = _extract_ready_threshold(meta, "ai_threshold_recommended", "threshold")
+        if val is not None:
+            return val
+    except FileNotFoundError:
+        pass
     except Exception:
         pass
     return None
@@ -724,6 +824,11 @@ _last_wallet_check   : float = 0.0
 # Vectores de features pendientes de etiquetar (por mint/address)
 _pending_ai_vectors: Dict[str, List[float]] = {}  # address → feature_vector
 
+# Filas Token pendientes de upsert (se vuelcan en bloque una vez por tick)
+_pending_token_rows: Dict[str, Dict[str, Any]] = {}  # address → columnas Token
+_token_row_failures: Dict[str, int] = {}  # address → flushes fallidos (fila a fila)
+_TOKEN_ROW_MAX_TRIES = 3
+
 # NUEVO: shadow positions (modo real)
 _shadow_positions: Dict[str, Dict[str, object]] = {}  # address → {"vec":..., "opened_at":..., "buy_price_usd":...}
 
@@ -744,6 +849,9 @@ _stats = {
 }
 _last_stats_print: float = time.monotonic()
 _last_csv_export : float = time.monotonic()
+_csv_export_task: Optional[asyncio.Task] = None   # export en curso (thread)
+_last_features_flush: float = time.monotonic()
+_FEATURES_FLUSH_INTERVAL_S = 30
 _last_buy_at: Optional[dt.datetime] = None
 _last_sell_at: Optional[dt.datetime] = None
 _last_wallet_checked_at: Optional[dt.datetime] = None
@@ -860,6 +968,21 @@ def _remember_queue_context(addr: str, token: dict | None = None) -> None:
         meta["entry_regime"] = str(entry_regime)
 
 
+# Backoff de re-queue "no_liq" con jitter ±20 %: tabla precalculada (Python
+# floats) recorrida con índice circular en vez de random.uniform por rechazo.
+_NO_LIQ_BACKOFF_S = (60, 180, 420)
+_JITTER_LUT = np.random.default_rng().uniform(0.8, 1.2, 1024).tolist()
+_JITTER_MASK = len(_JITTER_LUT) - 1
+_jitter_idx = 0
+
+
+def _jitter() -> float:
+    global _jitter_idx
+    i = _jitter_idx
+    _jitter_idx = (i + 1) & _JITTER_MASK
+    return _JITTER_LUT[i]
+
+
 def _requeue_with_stats(addr: str, *, reason: str = "", backoff: int | None = None, token: dict | None = None) -> bool:
     _remember_queue_context(addr, token)
     queued = requeue(addr, reason=reason, backoff=backoff)
@@ -2786,30 +2909,63 @@ async def _maybe_open_research_shadow(
 _PF_PRICE_QUOTA        = int(os.getenv("PUMPFUN_PRICE_QUOTA", "4"))       # intentos/ventana
 _PF_PRICE_QUOTA_WINDOW = int(os.getenv("PUMPFUN_PRICE_QUOTA_WINDOW", "10"))  # seg
 _PF_COOLDOWN_S         = int(os.getenv("PUMPFUN_PRICE_ATTEMPT_COOLDOWN", "25"))
-_pf_attempt_bucket: deque[float] = deque(maxlen=64)   # timestamps monotonic
-_pf_last_attempt: dict[str, float] = {}
-
-def _pf_can_try_now(addr: str) -> bool:
-    """Cuota global y cooldown por token para intentos rápidos de precio (Pump.fun)."""
-    now = time.monotonic()
+_PF_SLOTS = 1024   # tabla de cooldown por token (potencia de 2, open addressing)
+_PF_PROBE = 8      # huecos sondeados por clave
+# cupo global: ring-buffer de timestamps monotonic_ns (mismo kernel que el BUY limiter)
+_pf_attempt_ts = np.zeros(max(1, _PF_PRICE_QUOTA), dtype=np.int64)
+_pf_head = 0
+_pf_count = 0
+# cooldown por token: hash(addr) → último intento (last == 0 → hueco libre)
+_pf_keys = np.zeros(_PF_SLOTS, dtype=np.int64)
+_pf_last = np.zeros(_PF_SLOTS, dtype=np.int64)
+
+
+@njit(_SIG_PF_TRY_CORE, cache=True)
+def _pf_can_try_now_core(keys, last, ts, head, count, window_ns, cooldown_ns, now, key):
+    """
+    Cooldown por token + cupo global en una sola pasada.
+    Devuelve (head, count, permitido); si se permite, reserva ambos.
+    """
+    mask = keys.shape[0] - 1
+    base = key & mask
+    slot = -1
+    for i in range(_PF_PROBE):
+        j = (base + i) & mask
+        if last[j] > 0 and keys[j] == key:
+            if now - last[j] < cooldown_ns:
+                return head, count, False
+            slot = j
+            break
+    if slot < 0:
+        # hueco libre o caducado; si no hay, se recicla el más antiguo
+        oldest = base
+        for i in range(_PF_PROBE):
+            j = (base + i) & mask
+            if last[j] == 0 or now - last[j] >= cooldown_ns:
+                slot = j
+                break
+            if last[j] < last[oldest]:
+                oldest = j
+        if slot < 0:
+            slot = oldest
 
-    # cooldown por token
-    last = _pf_last_attempt.get(addr, 0.0)
-    if now - last < _PF_COOLDOWN_S:
-        return False
+    head, count, ok = _bucket_allow(ts, head, count, window_ns, now, 1)
+    if ok:
+        keys[slot] = key
+        last[slot] = now
+    return head, count, ok
 
-    # limpia ventana
-    while _pf_attempt_bucket and (now - _pf_attempt_bucket[0] > _PF_PRICE_QUOTA_WINDOW):
-        _pf_attempt_bucket.popleft()
 
-    # cupo global
-    if len(_pf_attempt_bucket) >= _PF_PRICE_QUOTA:
+def _pf_can_try_now(addr: str) -> bool:
+    """Cuota global y cooldown por token para intentos rápidos de precio (Pump.fun)."""
+    global _pf_head, _pf_count
+    if _PF_PRICE_QUOTA <= 0:
         return False
-
-    # reserva hueco
-    _pf_attempt_bucket.append(now)
-    _pf_last_attempt[addr] = now
-    return True
+    _pf_head, _pf_count, ok = _pf_can_try_now_core(
+        _pf_keys, _pf_last, _pf_attempt_ts, _pf_head, _pf_count,
+        _PF_PRICE_QUOTA_WINDOW * _NS, _PF_COOLDOWN_S * _NS, time.monotonic_ns(), hash(addr),
+    )
+    return bool(ok)
 
 
 # ╭─────────────────────── Helpers de balance ────────────────────────────────╮
@@ -3172,6 +3328,7 @@ async def _run_retrain_once(*, source: str, force_requested: bool = False) -> di
     async with _retrain_lock:
         _runtime_retrain_state = "running"
         try:
+            await asyncio.to_thread(store_flush)  # el retrain lee los Parquet
             trained = bool(await asyncio.to_thread(retrain_if_better))
             reload_result = await _reload_model_now() if trained else None
             scorecard_result = (
@@ -3439,6 +3596,7 @@ async def _open_shadow(
         shadow_payload = {
             "vec": vec,
             "opened_at": opened_at,
+            "opened_ts": opened_at.timestamp(),  # epoch: edad por resta de floats en cada tick
             "buy_price_usd": float(price) if price is not None else None,
             "entry_regime": regime or "dex_mature",
             "highest_pnl_pct": 0.0,
@@ -3500,39 +3658,62 @@ async def _open_shadow(
     except Exception as exc:
         log.debug("open_shadow %s → %s", addr[:6], exc)
 
+async def _shadow_quote(addr: str) -> Tuple[Optional[float], Optional[float]]:
+    """(close_price, liq_now) de una sombra: get_price (con liquidez) → get_price_usd."""
+    tok = None
+    try:
+        tok = await price_service.get_price(addr, use_gt=_RESEARCH_SHADOW_USE_GECKO, allow_partial=True)
+    except Exception:
+        tok = None
+
+    close_price = None
+    liq_now = None
+    if tok:
+        close_price = _to_float(tok.get("price_usd"))
+        liq_now = _to_float(tok.get("liquidity_usd"))
+    if close_price is None:
+        try:
+            close_price = await price_service.get_price_usd(addr, use_gt=_RESEARCH_SHADOW_USE_GECKO)
+        except Exception:
+            close_price = None
+    return close_price, liq_now
+
+
 async def _tick_shadows() -> None:
     """Revisa sombras paralelas y las cierra con una simulación ligera de la policy de exits."""
     if not _shadow_positions:
         return
     now = utc_now()
     to_delete: List[str] = []
+    live: List[Tuple[str, Dict[str, object]]] = []
+    for addr, sd in _shadow_positions.items():
+        if sd.get("opened_at"):
+            live.append((addr, sd))
+        else:
+            to_delete.append(addr)
+
+    # Precios de todas las sombras en paralelo (acotado), no N × RTT en serie
+    quote_sem = asyncio.Semaphore(MONITOR_PRICE_CONCURRENCY)
+
+    async def _bounded_quote(addr: str) -> Tuple[Optional[float], Optional[float]]:
+        async with quote_sem:
+            return await _shadow_quote(addr)
 
-    for addr, sd in list(_shadow_positions.items()):
+    quotes = await asyncio.gather(*(_bounded_quote(addr) for addr, _ in live))
+
+    now_ts = now.timestamp()
+    for (addr, sd), (close_price, liq_now) in zip(live, quotes):
         opened = sd.get("opened_at")
-        if not opened:
-            to_delete.append(addr)
-            continue
+        opened_ts = sd.get("opened_ts")
+        if opened_ts is None:
+            opened_ts = sd["opened_ts"] = (
+                opened if opened.tzinfo is not None else opened.replace(tzinfo=dt.timezone.utc)
+            ).timestamp()
+        age_s = max(0.0, now_ts - float(opened_ts))
         regime = str(sd.get("entry_regime") or "dex_mature")
         shadow_policy = exit_policy.effective_exit_policy(sd)
         buy_price = _to_float(sd.get("buy_price_usd"))
 
-        tok = None
-        try:
-            tok = await price_service.get_price(addr, use_gt=_RESEARCH_SHADOW_USE_GECKO, allow_partial=True)
-        except Exception:
-            tok = None
-
-        close_price = None
-        liq_now = None
-        if tok:
-            close_price = _to_float(tok.get("price_usd"))
-            liq_now = _to_float(tok.get("liquidity_usd"))
-        if close_price is None:
-            try:
-                close_price = await price_service.get_price_usd(addr, use_gt=_RESEARCH_SHADOW_USE_GECKO)
-            except Exception:
-                close_price = None
-
         pnl_pct_total = None
         label = 0
         peak = float(sd.get("highest_pnl_pct") or 0.0)
@@ -3545,9 +3726,7 @@ async def _tick_shadows() -> None:
                 sd["highest_pnl_pct"] = peak
                 sd["max_pnl_pct_seen"] = peak
                 sd["peak_price_usd"] = float(close_price)
-                peak_age_s = _seconds_from_opened_at(opened, now)
-                if peak_age_s is not None:
-                    sd["time_to_peak_sec"] = peak_age_s
+                sd["time_to_peak_sec"] = int(age_s)
                 if bool(sd.get("partial_taken")):
                     current_peak_after_partial = _to_float(sd.get("peak_after_partial_pct"), 0.0) or 0.0
                     if peak > current_peak_after_partial:
@@ -3574,9 +3753,8 @@ async def _tick_shadows() -> None:
                 sd["remaining_fraction"] = max(0.0, remaining_before - sell_fraction)
                 sd["partial_taken"] = True
                 sd["partial_fraction"] = sell_fraction
-                partial_age_s = _seconds_from_opened_at(opened, now)
-                if partial_age_s is not None and sd.get("time_to_partial_sec") is None:
-                    sd["time_to_partial_sec"] = partial_age_s
+                if sd.get("time_to_partial_sec") is None:
+                    sd["time_to_partial_sec"] = int(age_s)
                 sd["peak_after_partial_pct"] = max(
                     float(sd.get("peak_after_partial_pct") or 0.0),
                     float(pnl_ratio_partial * 100.0),
@@ -3594,10 +3772,10 @@ async def _tick_shadows() -> None:
             now,
             liq_now=liq_now,
             pnl_pct=pnl_pct_live,
+            age_s=age_s,
         )
         if exit_reason is None and close_price is None:
-            age_h = (now - opened).total_seconds() / 3600.0
-            if age_h < float(shadow_policy.max_holding_h):
+            if age_s < float(shadow_policy.max_holding_h) * 3600.0:
                 continue
             exit_reason = "TIMEOUT_NOPRICE"
         elif exit_reason is None:
@@ -3655,14 +3833,31 @@ async def _tick_shadows() -> None:
 
 
 # ───────────────────────── helpers pool/route/DEX ───────────────────────────
-def _norm_dex_id(raw: Optional[str]) -> Optional[str]:
-    if not raw:
-        return None
-    s = str(raw).strip().lower().replace(" ", "")
+@functools.lru_cache(maxsize=256)
+def _norm_dex_id_str(raw: str) -> Optional[str]:
+    s = raw.strip().lower().replace(" ", "")
     # normalizaciones rápidas típicas
     s = s.replace("_", "").replace("-", "")
     return s or None
 
+
+def _norm_dex_id(raw: Optional[str]) -> Optional[str]:
+    # pocos dexId distintos (<20): la normalización se memoiza por string
+    if not raw:
+        return None
+    return _norm_dex_id_str(raw if isinstance(raw, str) else str(raw))
+
+
+# Whitelist normalizada una vez: el guard de BUY es una pertenencia O(1)
+_DEX_WHITELIST_NORM = frozenset(d for d in map(_norm_dex_id, DEX_WHITELIST) if d)
+
+# Sonda de ruta SOL→token: mint y clamp del importe fijos a nivel de módulo
+_SOL_MINT = "So11111111111111111111111111111111111111112"
+_JUP_AMT_MIN = 0.005
+_JUP_AMT_MAX = 0.2
+_JUP_AMT_DEFAULT = 0.01
+
+
 async def _has_jupiter_route(output_mint: str, amount_sol: float) -> Optional[bool]:
     """Devuelve True/False si hay ruta según router; None si router no disponible/error."""
     probe = await _probe_jupiter_route(output_mint, amount_sol)
@@ -3678,9 +3873,13 @@ async def _probe_jupiter_route(output_mint: str, amount_sol: float) -> Dict[str,
     }
     try:
         if _JUP_ROUTER_AVAILABLE and jupiter is not None:
-            SOL_MINT = "So11111111111111111111111111111111111111112"
-            amt = max(0.005, min(float(amount_sol or 0.01), 0.2))
-            q = await jupiter.get_quote(input_mint=SOL_MINT, output_mint=output_mint, amount_sol=amt)
+            amt = float(amount_sol or _JUP_AMT_DEFAULT)
+            amt = _JUP_AMT_MIN if amt < _JUP_AMT_MIN else (_JUP_AMT_MAX if amt > _JUP_AMT_MAX else amt)
+            # una quote colgada no debe bloquear el camino de BUY
+            q = await asyncio.wait_for(
+                jupiter.get_quote(input_mint=_SOL_MINT, output_mint=output_mint, amount_sol=amt),
+                timeout=JUP_ROUTE_PROBE_TIMEOUT_S,
+            )
             impact_bps = getattr(q, "price_impact_bps", None)
             impact_pct = None
             if isinstance(impact_bps, (int, float)):
@@ -3831,27 +4030,113 @@ def _green_shadow_can_continue_to_runner_canary(token: dict, decision: object) -
     return True
 
 
+async def _upsert_token_rows(ses: SessionLocal, cols: tuple, rows: List[Dict[str, Any]]) -> None:
+    stmt = sqlite_insert(Token)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Token.address],
+        set_={c: stmt.excluded[c] for c in cols if c != "address"},
+    )
+    await ses.execute(stmt, rows)
+
+
+async def _flush_token_rows(ses: SessionLocal) -> int:
+    """
+    Vuelca `_pending_token_rows` con un único INSERT … ON CONFLICT DO UPDATE
+    por forma de fila (executemany) y un solo commit.
+    Sustituye al antiguo `merge()+commit()` por token.
+    Las filas solo salen del buffer tras el commit. Si el lote falla se
+    reintenta fila a fila: una fila que sigue fallando se reintenta en los
+    siguientes ticks y se descarta tras _TOKEN_ROW_MAX_TRIES (una fila
+    "venenosa" no bloquea al resto). Devuelve las filas escritas.
+    """
+    if not _pending_token_rows:
+        return 0
+    snapshot = dict(_pending_token_rows)
+
+    # executemany exige el mismo set de columnas en todas las filas
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for row in snapshot.values():
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    done: Dict[str, Dict[str, Any]] = {}
+    try:
+        for cols, group in groups.items():
+            await _upsert_token_rows(ses, cols, group)
+        await ses.commit()
+        done = snapshot
+    except SQLAlchemyError as exc:
+        try:
+            await ses.rollback()
+        except Exception:
+            pass
+        log.warning("DB upsert tokens (%d filas) → %s; reintento fila a fila", len(snapshot), exc)
+        for addr, row in snapshot.items():
+            try:
+                await _upsert_token_rows(ses, tuple(sorted(row)), [row])
+                await ses.commit()
+            except SQLAlchemyError as row_exc:
+                try:
+                    await ses.rollback()
+                except Exception:
+                    pass
+                tries = _token_row_failures.get(addr, 0) + 1
+                _token_row_failures[addr] = tries
+                if tries < _TOKEN_ROW_MAX_TRIES:
+                    log.error("DB upsert token %s (intento %d) → %s", addr[:4], tries, row_exc)
+                    continue
+                log.error("DB upsert token %s descartado tras %d intentos → %s", addr[:4], tries, row_exc)
+            else:
+                done[addr] = row
+    written = 0
+    for addr, row in snapshot.items():
+        tries = _token_row_failures.get(addr, 0)
+        if addr in done:
+            written += 1
+        elif tries < _TOKEN_ROW_MAX_TRIES:
+            continue
+        _token_row_failures.pop(addr, None)
+        # solo si nadie la reemplazó mientras se esperaba al commit
+        if _pending_token_rows.get(addr) is row:
+            del _pending_token_rows[addr]
+    return written
+
+
+async def _token_row_persisted(ses: SessionLocal, addr: str) -> bool:
+    """
+    Vuelca el buffer de Token y confirma que la fila de `addr` está en BD
+    (la FK positions.address → tokens.address la exige antes de comprar).
+    Se comprueba en BD porque otra evaluación puede haber volcado ya la fila.
+    """
+    await _flush_token_rows(ses)
+    try:
+        return (await ses.get(Token, addr)) is not None
+    except SQLAlchemyError as exc:
+        log.error("DB lookup token %s → %s", addr[:4], exc)
+        return False
+
+
 async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
     """Evalúa un token y, si pasa los filtros + IA, lanza la compra."""
     global _wallet_sol_balance
 
     token = sanitize_token_data(token)
     addr = token["address"]
-    _stats["raw_discovered"] += 1
-    if str(token.get("discovered_via") or "").strip().lower() == "pumpfun" and _stream_candidate_is_cooled(addr):
-        return
 
     # 0) — gate horario (24/7 si no hay ventanas; BLOCK_HOURS siempre aplica si define) —
-    if not _in_trading_window():
-        delay = max(30, _delay_until_window())
+    if _HAS_WINDOWS and not _in_trading_window():
+        now_local = dt.datetime.now()
+        delay = max(30, _delay_until_window(now_local))
         # Motivo de log diferenciado
-        if _BLOCK_HOURS and _in_ranges(dt.datetime.now(), _BLOCK_HOURS):
+        if _HOUR_BLOCKED[now_local.hour]:
             reason = "blocked_hour"
         else:
             reason = "off_hours"
         _requeue_with_stats(addr, reason=reason, backoff=delay)
         return
 
+    _stats["raw_discovered"] += 1
+    if str(token.get("discovered_via") or "").strip().lower() == "pumpfun" and _stream_candidate_is_cooled(addr):
+        return
+
     # 1) — limpieza básica + log preliminar —
     require_jup_for_buy = filters.effective_require_jupiter_for_buy(token, _REQUIRE_JUP_FOR_BUY)
     queue_meta = lista_pares.meta(addr)
@@ -3877,13 +4162,7 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
         warn_if_nulls(token, context=addr[:4])
     _log_token(token, addr)
 
-    # 2) — duplicado: ya hay posición abierta —
-    if await ses.scalar(select(Position).where(Position.address == addr,
-                                               Position.closed.is_(False))):
-        _remove_from_queue_if_present(addr)
-        return
-
-    # 3) — filtros inmediatos —
+    # 2) — filtros inmediatos (pertenencia a set, antes que nada) —
     if token.get("creator") in BANNED_CREATORS:
         _stats["filtered_out"] += 1
         _store_policy_reject(token, reason="banned_creator")
@@ -3891,6 +4170,11 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
         _remove_from_queue_if_present(addr)
         return
 
+    # 3) — duplicado: ya hay posición abierta (set en memoria, sin SQL) —
+    if addr in _OPEN_POSITIONS:
+        _remove_from_queue_if_present(addr)
+        return
+
     # ★ Pump.fun: intento rápido de precio con cuota/cooldown antes de requeue
     if token.get("discovered_via") == "pumpfun" and not token.get("liquidity_usd"):
         if _pf_can_try_now(addr):
@@ -3935,9 +4219,8 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
             _remember_stream_candidate_cooldown(addr, _PUMPFUN_STREAM_COOLDOWN_NO_LIQ_S)
             return
 
-        attempts = int((meta := lista_pares.meta(addr) or {}).get("attempts", 0))
-        backoff  = [60, 180, 420][min(attempts, 2)]
-        backoff  = int(backoff * random.uniform(0.8, 1.2))  # jitter ±20%
+        attempts = int(meta.get("attempts", 0) or 0)  # `meta`: dict vivo de la cola (paso 1)
+        backoff  = int(_NO_LIQ_BACKOFF_S[min(attempts, 2)] * _jitter())  # jitter ±20%
         log.info("↩️  Re-queue %s (no_liq, intento %s)",
                  token.get("symbol") or addr[:4], attempts + 1)
 
@@ -4052,29 +4335,38 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
         token.setdefault("trend", None)
         token.setdefault("trend_fallback_used", True)
         token.setdefault("insider_sig", False)
-        token["score_total"] = filters.total_score(token)
-    else:
-        token["social_ok"] = await socials.has_socials(addr)
-    if not (green_fast_path and DRY_RUN and bool(getattr(CFG, "PAPER_SNIPER_MODE", False))):
-        try:
-            token["trend"], token["trend_fallback_used"] = await trend.trend_signal(addr)
-        except trend.Trend404Retry:
-            pass
-        log.debug("⚠️  %s sin datos trend – continúa", addr[:4])
-        if False:
-            token["trend"] = None
-            token["trend_fallback_used"] = True
+    fetch_trend = not (green_fast_path and DRY_RUN and bool(getattr(CFG, "PAPER_SNIPER_MODE", False)))
+    # Sondas independientes (I/O) → en paralelo; latencia = max() en vez de Σ
+    probes: Dict[str, Any] = {}
+    if not green_fast_path:
+        probes["social_ok"] = socials.has_socials(addr)
+    if fetch_trend:
+        probes["trend"] = trend.trend_signal(addr)
+        probes["insider_sig"] = insider.insider_alert(addr)
+    results = dict(zip(probes, await asyncio.gather(*probes.values(), return_exceptions=True)))
+    for res in results.values():
+        if isinstance(res, BaseException) and not isinstance(res, trend.Trend404Retry):
+            raise res
+    if "social_ok" in results:
+        token["social_ok"] = results["social_ok"]
+    if fetch_trend:
+        trend_res = results["trend"]
+        if isinstance(trend_res, trend.Trend404Retry):
+            log.debug("⚠️  %s sin datos trend – continúa", addr[:4])
+        else:
+            token["trend"], token["trend_fallback_used"] = trend_res
         token.setdefault("trend", None)
         token.setdefault("trend_fallback_used", token.get("trend") is None)
 
-        token["insider_sig"] = await insider.insider_alert(addr)
-        token["score_total"] = filters.total_score(token)
+        token["insider_sig"] = results["insider_sig"]
 
     # 7) — filtro duro —
+    # score_total se calcula una sola vez tras las señales caras (8); aquí solo
+    # hace falta para registrar el descarte/requeue.
     if (not (green_fast_path or moonshot_fast_path)) and filters.basic_filters(token) is not True:
-        attempts = int((meta := lista_pares.meta(addr) or {}).get("attempts", 0))
-        keep, delay, reason = requeue_policy.decide(token, attempts,
-                                                    meta.get("first_seen", time.time()))
+        token["score_total"] = filters.total_score(token)
+        attempts = int(meta.get("attempts", 0) or 0)
+        keep, delay, reason = requeue_policy.decide(token, attempts, first_seen_epoch_s)
         if keep:
             _research_decision(token, action="wait", reason=reason, stage="basic_filter", dedup_ttl_s=900)
             _requeue_with_stats(addr, reason=reason, backoff=delay, token=token)
@@ -4091,8 +4383,10 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
         token.setdefault("rug_score", None)
         token.setdefault("cluster_bad", False)
     else:
-        token["rug_score"]   = await rugcheck.check_token(addr)
-        token["cluster_bad"] = await clusters.suspicious_cluster(addr)
+        token["rug_score"], token["cluster_bad"] = await asyncio.gather(
+            rugcheck.check_token(addr),
+            clusters.suspicious_cluster(addr),
+        )
     token["score_total"] = filters.total_score(token)
     if moonshot_fast_path:
         moonshot_decision = evaluate_moonshot_micro_lottery(token, dry_run=DRY_RUN, live=not DRY_RUN)
@@ -4127,8 +4421,8 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
     if not quality_ok:
         log.debug("🧱 Snapshot quality gate: %s (%s)", addr[:6], quality_reason or "blocked")
         _stats["filtered_out"] += 1
-        vec = build_feature_vector(token)
-        _store_policy_reject(vec, already_vector=True, reason=f"snapshot:{quality_reason or 'blocked'}")
+        # el vector solo hace falta si el rechazo no está deduplicado
+        _store_policy_reject(token, reason=f"snapshot:{quality_reason or 'blocked'}")
         _research_decision(
             token,
             action="rejected",
@@ -4672,6 +4966,8 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
             _remove_from_queue_if_present(addr)
             return
 
+    # Desde aquí (capacidad → compra → Position) una sola evaluación a la vez
+    await _enter_buy_stage()
     capacity_ok, regime_open, regime_cap = await _regime_capacity(ses, size_decision.regime)
     if not capacity_ok:
         log.info(
@@ -5040,11 +5336,9 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
         if dex_id_norm:
             token["dex_id"] = dex_id_norm
         token_db = prepare_token_for_db(token)
-        valid_cols = {c.key for c in inspect(Token).mapper.column_attrs}
-        await ses.merge(Token(**{k: v for k, v in token_db.items() if k in valid_cols}))
-        await ses.commit()
-    except SQLAlchemyError as exc:
-        await ses.rollback()
+        _pending_token_rows[addr] = {k: v for k, v in token_db.items() if k in _TOKEN_COLS}
+        _pending_token_rows[addr]["address"] = addr
+    except Exception as exc:
         log.error("DB insert token %s → %s", addr[:4], exc)
         _pending_ai_vectors.pop(addr, None)
         _research_decision(
@@ -5061,9 +5355,10 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
         return
 
     # 11.5) — Guard de pool (DEX whitelist) + ruta Jupiter (si router) —
+    jup_price_task: Optional[asyncio.Task] = None
     if REQUIRE_POOL_INITIALIZED:
         dex_id_norm = _norm_dex_id(token.get("dex_id") or token.get("dexId"))
-        if dex_id_norm and DEX_WHITELIST and dex_id_norm not in DEX_WHITELIST:
+        if dex_id_norm and _DEX_WHITELIST_NORM and dex_id_norm not in _DEX_WHITELIST_NORM:
             log.info("🛑 BUY bloqueado: DEX no whitelisted (dex=%s, allow=%s)", dex_id_norm, ",".join(DEX_WHITELIST))
             _stats["filtered_out"] += 1
             _pending_ai_vectors.pop(addr, None)
@@ -5080,12 +5375,17 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
             _remove_from_queue_if_present(addr)
             return
 
-        # Mejor aún: comprobar ruta ejecutable (si router disponible)
+        # Mejor aún: comprobar ruta ejecutable (si router disponible).
+        # El precio Jupiter del paso 12 se pide ya → su RTT se solapa con el de la ruta.
+        if require_jup_for_buy:
+            jup_price_task = asyncio.create_task(price_service.get_price(addr, price_only=True))
+            jup_price_task.add_done_callback(lambda t: t.cancelled() or t.exception())
         has_route = await _has_jupiter_route(addr, amount_sol)
 
         # ⚠️ Cambio clave: solo BLOQUEAMOS si la política exige Jupiter.
         if require_jup_for_buy:
             if has_route is False:
+                jup_price_task.cancel()
                 log.info("🛑 BUY bloqueado: sin ruta Jupiter (mint=%s, reason=no_route)", addr[:6])
                 _pending_ai_vectors.pop(addr, None)
                 _research_decision(
@@ -5109,7 +5409,7 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
     # 12) — “Exigir Jupiter” para comprar (solo precio) —
     if require_jup_for_buy:
         try:
-            jtok = await price_service.get_price(addr, price_only=True)  # usa flag interno
+            jtok = await (jup_price_task or price_service.get_price(addr, price_only=True))  # usa flag interno
         except Exception:
             jtok = None
         if not jtok or jtok.get("price_usd") in (None, 0):
@@ -5163,6 +5463,23 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
         _remove_from_queue_if_present(addr)
         return
 
+    # 12.4) — Fila TOKEN ya en BD antes de comprar (si no, db_insert_error) —
+    if not await _token_row_persisted(ses, addr):
+        log.error("DB insert token %s → fila no persistida; no se compra", addr[:4])
+        _pending_ai_vectors.pop(addr, None)
+        _research_decision(
+            token,
+            action="rejected",
+            reason="db_insert_error",
+            stage="db",
+            proba=proba,
+            threshold=ai_threshold_eff,
+            rank_info=rank_info,
+            dedup_ttl_s=300,
+        )
+        _remove_from_queue_if_present(addr)
+        return
+
     # 12.5) — Rate limiter de BUY (no bloqueante): cooldown si no permite —
     if not _BUY_LIMITER.allow():
         cur = _BUY_LIMITER.current()
@@ -5380,22 +5697,24 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
         buy_market_cap_usd=token.get("market_cap_usd"),
         buy_volume_24h_usd=token.get("volume_24h_usd"),
     )
-    if hasattr(pos, "token_mint"):
+    if _POS_HAS["token_mint"]:
         pos.token_mint = token.get("address") or addr
-    if hasattr(pos, "price_source_at_buy"):
+    if _POS_HAS["price_source_at_buy"]:
         pos.price_source_at_buy = price_src
-    if hasattr(pos, "buy_tx_sig"):
+    if _POS_HAS["buy_tx_sig"]:
         pos.buy_tx_sig = buy_sig or None
 
     # Compat opcional (si existiera el alias en tu modelo)
-    if hasattr(pos, "liq_at_buy_usd"):
+    if _POS_HAS["liq_at_buy_usd"]:
         try:
             setattr(pos, "liq_at_buy_usd", float(token.get("liquidity_usd") or 0.0))
         except Exception:
             setattr(pos, "liq_at_buy_usd", None)
 
+    # La FK positions.address → tokens.address: fila Token confirmada en 12.4
     ses.add(pos)
     await ses.commit()
+    _OPEN_POSITIONS.add(addr)
 
     if (meta := lista_pares.meta(addr)) and meta.get("attempts", 0) > 0:
         _stats["requeue_success"] += 1
@@ -5417,8 +5736,36 @@ async def _evaluate_and_buy(token: dict, ses: SessionLocal) -> None:
     _remove_from_queue_if_present(addr)
 
 
+_eval_sem: Optional[asyncio.Semaphore] = None
+_validation_sem: Optional[asyncio.Semaphore] = None
+_eval_inflight: set[str] = set()
+_buy_stage_lock = asyncio.Lock()
+_buy_stage_held: contextvars.ContextVar[Optional[Dict[str, bool]]] = contextvars.ContextVar(
+    "_buy_stage_held", default=None
+)
+
+
+async def _enter_buy_stage() -> None:
+    """
+    Serializa la fase capacidad→compra entre evaluaciones concurrentes
+    (evita superar caps de régimen/lane con dos compras simultáneas).
+    Lo libera `_evaluate_and_buy_guarded` al terminar la evaluación.
+    """
+    holder = _buy_stage_held.get()
+    if holder is None or holder["held"]:
+        return
+    await _buy_stage_lock.acquire()
+    holder["held"] = True
+
+
 async def _evaluate_and_buy_guarded(token: dict, ses: SessionLocal, *, source: str) -> None:
     addr = str((token or {}).get("address") or "???")
+    if addr in _eval_inflight:
+        log.debug("Eval %s %s omitida: ya en curso", source, addr[:6])
+        return
+    _eval_inflight.add(addr)
+    holder = {"held": False}
+    _buy_stage_held.set(holder)
     try:
         if EVALUATE_TOKEN_TIMEOUT_S > 0:
             await asyncio.wait_for(_evaluate_and_buy(token, ses), timeout=EVALUATE_TOKEN_TIMEOUT_S)
@@ -5430,11 +5777,87 @@ async def _evaluate_and_buy_guarded(token: dict, ses: SessionLocal, *, source: s
     except Exception as exc:
         _note_runtime_error(f"eval_{source}[{addr[:8]}]", exc)
         log.error("Eval %s %s → %s", source, addr[:6], exc)
+    finally:
+        _eval_inflight.discard(addr)
+        if holder["held"]:
+            holder["held"] = False
+            _buy_stage_lock.release()
+
+
+async def _evaluate_many(tokens: Sequence[dict], *, source: str) -> None:
+    """
+    Evalúa `tokens` en paralelo (máx. EVAL_CONCURRENCY a la vez), cada uno
+    con su propia AsyncSession: una sesión no admite uso concurrente.
+    """
+    global _eval_sem
+    if not tokens:
+        return
+    if _eval_sem is None:
+        _eval_sem = asyncio.Semaphore(EVAL_CONCURRENCY)
+
+    async def _one(tok: dict) -> None:
+        async with _eval_sem:
+            async with SessionLocal() as task_ses:
+                await _evaluate_and_buy_guarded(tok, task_ses, source=source)
+
+    await asyncio.gather(*(_one(tok) for tok in tokens))
+
+
+async def _validate_queued(addr: str) -> Optional[dict]:
+    """Resuelve precio de un par en cola (máx. VALIDATION_CONCURRENCY a la vez); None → requeue dex_nil."""
+    global _validation_sem
+    if _validation_sem is None:
+        _validation_sem = asyncio.Semaphore(VALIDATION_CONCURRENCY)
+    async with _validation_sem:
+        return await _validate_queued_unbounded(addr)
+
+
+async def _validate_queued_unbounded(addr: str) -> Optional[dict]:
+    try:
+        meta    = lista_pares.meta(addr) or {}
+        queue_age_s = max(0.0, time.time() - float(meta.get("first_seen", time.time()) or time.time()))
+        attempts = int(meta.get("attempts", 0) or 0)
+        use_gt  = attempts >= _GECKO_MIN_QUEUE_ATTEMPTS and queue_age_s >= _GECKO_MIN_QUEUE_AGE_S
+        tok     = await price_service.get_price(addr, use_gt=use_gt, allow_partial=True)
+        if tok is None and not use_gt and attempts >= _GECKO_MIN_QUEUE_ATTEMPTS and queue_age_s >= _GECKO_MIN_QUEUE_AGE_S:
+            # Un primer fallback con Gecko reduce requeues "dex_nil"
+            # cuando Jupiter/Birdeye/DexScreener no completan liquidez.
+            tok = await price_service.get_price(addr, use_gt=True, allow_partial=True)
+        if not tok:
+            _requeue_with_stats(addr, reason="dex_nil")
+            return None
+        return tok
+    except Exception as exc:
+        log.error("get_price %s → %s", addr[:6], exc)
+        return None
 
 
 # ╭─────────────────────── Exit strategy (monitor) ───────────────────────────╮
+# Direcciones con posición abierta: el check de duplicado del paso 3 es una
+# pertenencia O(1) en vez de una query por candidato. Se mantiene en BUY /
+# cierre y se resincroniza con la BD en cada ciclo del monitor.
+_OPEN_POSITIONS: set[str] = set()
+
+
+def _sync_open_positions(loaded: set[str], before: frozenset[str]) -> None:
+    """
+    Alinea `_OPEN_POSITIONS` con la BD. `before` es el contenido previo a la
+    query: solo se retiran las direcciones que ya estaban y la BD no devuelve,
+    para no perder una compra confirmada mientras la query estaba en vuelo.
+    """
+    _OPEN_POSITIONS.difference_update(before - loaded)
+    _OPEN_POSITIONS.update(loaded)
+
+
+async def _load_open_position_addresses(ses: SessionLocal) -> set[str]:
+    stmt = select(Position.address).where(Position.closed.is_(False))
+    return set((await ses.execute(stmt)).scalars().all())
+
+
 async def _load_open_positions(ses: SessionLocal) -> Sequence[Position]:
-    stmt = select(Position).where(Position.closed.is_(False))
+    # raiseload: el monitor no navega relaciones; un acceso accidental falla
+    # en vez de lanzar una query implícita por posición.
+    stmt = select(Position).where(Position.closed.is_(False)).options(raiseload("*"))
     return (await ses.execute(stmt)).scalars().all()
 
 
@@ -5660,13 +6083,20 @@ async def _should_exit(
     *,
     liq_now: Optional[float] = None,
     pnl_pct: Optional[float] = None,
+    now_epoch: Optional[float] = None,
 ) -> Optional[str]:
+    age_s = None
+    if now_epoch is not None:
+        opened_epoch = _position_opened_epoch(pos)
+        if opened_epoch is not None:
+            age_s = now_epoch - opened_epoch
     return exit_policy.should_exit(
         pos,
         price,
         now,
         liq_now=liq_now,
         pnl_pct=pnl_pct,
+        age_s=age_s,
     )
 
 
@@ -5756,6 +6186,37 @@ def _config_hash() -> str:
     return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
 
 
+# Position.id → epoch de apertura. El monitor abre una sesión por ciclo (las
+# instancias ORM son nuevas cada vez), así que el memo por instancia no basta.
+_OPENED_EPOCH_BY_ID: Dict[int, float] = {}
+
+
+def _position_opened_epoch(pos: Position) -> float | None:
+    """Epoch UTC de apertura; se cachea por instancia y por id (opened_at no cambia)."""
+    cached = pos.__dict__.get("_opened_epoch")
+    if cached is not None:
+        return cached
+    pos_id = pos.__dict__.get("id")
+    if pos_id is not None and (cached := _OPENED_EPOCH_BY_ID.get(pos_id)) is not None:
+        pos.__dict__["_opened_epoch"] = cached
+        return cached
+    opened_raw = getattr(pos, "opened_at", None)
+    try:
+        if isinstance(opened_raw, str):
+            opened_raw = parse_iso_utc(opened_raw)
+        if not isinstance(opened_raw, dt.datetime):
+            return None
+        if opened_raw.tzinfo is None:
+            opened_raw = opened_raw.replace(tzinfo=dt.timezone.utc)
+        epoch = opened_raw.timestamp()
+    except Exception:
+        return None
+    pos.__dict__["_opened_epoch"] = epoch
+    if pos_id is not None:
+        _OPENED_EPOCH_BY_ID[pos_id] = epoch
+    return epoch
+
+
 def _seconds_from_opened_at(opened_at: object, now: dt.datetime) -> int | None:
     if not isinstance(opened_at, dt.datetime):
         return None
@@ -5774,24 +6235,24 @@ def _update_position_peak_metrics(
     changed = False
     peak_before = float(getattr(pos, "highest_pnl_pct", 0.0) or 0.0)
     if float(pnl_pct) <= peak_before:
-        if hasattr(pos, "max_pnl_pct_seen"):
+        if _POS_HAS["max_pnl_pct_seen"]:
             pos.max_pnl_pct_seen = peak_before
         return False
 
     pos.highest_pnl_pct = float(pnl_pct)
-    if hasattr(pos, "max_pnl_pct_seen"):
+    if _POS_HAS["max_pnl_pct_seen"]:
         pos.max_pnl_pct_seen = float(pnl_pct)
     if price_usd is not None:
-        if hasattr(pos, "peak_price_usd"):
+        if _POS_HAS["peak_price_usd"]:
             pos.peak_price_usd = float(price_usd)
-        if hasattr(pos, "peak_price"):
+        if _POS_HAS["peak_price"]:
             pos.peak_price = float(price_usd)
     peak_age_s = _seconds_from_opened_at(getattr(pos, "opened_at", None), observed_at)
-    if peak_age_s is not None and hasattr(pos, "time_to_peak_sec"):
+    if peak_age_s is not None and _POS_HAS["time_to_peak_sec"]:
         current_peak_s = getattr(pos, "time_to_peak_sec", None)
         if current_peak_s is None or peak_age_s < int(current_peak_s):
             pos.time_to_peak_sec = peak_age_s
-    if bool(getattr(pos, "partial_taken", False)) and hasattr(pos, "peak_after_partial_pct"):
+    if bool(getattr(pos, "partial_taken", False)) and _POS_HAS["peak_after_partial_pct"]:
         prev_peak_after_partial = getattr(pos, "peak_after_partial_pct", None)
         prev_peak_after_partial_f = float(prev_peak_after_partial or 0.0) if prev_peak_after_partial is not None else 0.0
         if float(pnl_pct) > prev_peak_after_partial_f:
@@ -5802,33 +6263,35 @@ def _update_position_peak_metrics(
 
 def _finalize_position_runner_metrics(pos: Position) -> None:
     peak_pct = float(getattr(pos, "highest_pnl_pct", 0.0) or 0.0)
-    if hasattr(pos, "max_pnl_pct_seen"):
+    if _POS_HAS["max_pnl_pct_seen"]:
         pos.max_pnl_pct_seen = peak_pct
     total_pnl_pct = getattr(pos, "total_pnl_pct", None)
     try:
         total_pnl_pct_f = float(total_pnl_pct) if total_pnl_pct is not None else None
     except Exception:
         total_pnl_pct_f = None
-    if total_pnl_pct_f is not None and hasattr(pos, "exit_from_peak_giveback_pct"):
+    if total_pnl_pct_f is not None and _POS_HAS["exit_from_peak_giveback_pct"]:
         pos.exit_from_peak_giveback_pct = max(0.0, peak_pct - total_pnl_pct_f)
 
 
 # ───── precarga de precios en batch para posiciones abiertas ────────────────
+# Mint SPL: base58 (sin 0/O/I/l), 30–50 chars; descarta también "0x…" (EVM)
+_MINT_RE = re.compile(r"^[1-9A-HJ-NP-Za-km-z]{30,50}$")
+
+
 async def _prefetch_batch_prices(addrs: List[str]) -> Dict[str, float]:
     """
     Devuelve un dict address->price_usd usando Jupiter Price v3 (Lite).
-    Si USE_JUPITER_PRICE=False, devuelve {}.
+    Si USE_JUPITER_PRICE=False, devuelve {}. Sin caché propia: jupiter_price
+    ya cachea por mint (JUPITER_TTL_OK / NIL) y un fallo devuelve {}.
     """
     if not USE_JUPITER_PRICE or not addrs:
         return {}
 
-    def _looks_like_mint(s: str) -> bool:
-        return bool(s) and (not s.startswith("0x")) and (30 <= len(s) <= 50)
-
     try:
-        for m in addrs:
-            if not _looks_like_mint(m):
-                log.warning("Monitor: ID no parece mint SPL → %r", m)
+        bad = [m for m in addrs if not (m and _MINT_RE.match(m))]
+        if bad:
+            log.warning("Monitor: IDs que no parecen mint SPL → %r", bad)
         prices = await jupiter_price.get_many_usd_prices(addrs)
         log.debug("Jupiter batch: %d/%d precios disponibles", len(prices), len(addrs))
         return prices
@@ -5887,38 +6350,38 @@ def _record_partial_trade_fill(
     )
 
     pos.qty = int(totals.remaining_qty)
-    if hasattr(pos, "entry_qty"):
+    if _POS_HAS["entry_qty"]:
         pos.entry_qty = int(totals.entry_qty)
-    if hasattr(pos, "realized_qty"):
+    if _POS_HAS["realized_qty"]:
         pos.realized_qty = int(totals.realized_qty)
-    if hasattr(pos, "realized_proceeds_usd"):
+    if _POS_HAS["realized_proceeds_usd"]:
         pos.realized_proceeds_usd = float(totals.realized_proceeds_usd)
-    if hasattr(pos, "realized_cost_usd"):
+    if _POS_HAS["realized_cost_usd"]:
         pos.realized_cost_usd = float(totals.realized_cost_usd)
-    if hasattr(pos, "realized_pnl_usd"):
+    if _POS_HAS["realized_pnl_usd"]:
         pos.realized_pnl_usd = float(totals.realized_pnl_usd)
-    if hasattr(pos, "partial_taken"):
+    if _POS_HAS["partial_taken"]:
         pos.partial_taken = True
-    if hasattr(pos, "partial_count"):
+    if _POS_HAS["partial_count"]:
         pos.partial_count = int(getattr(pos, "partial_count", 0) or 0) + max(1, int(partial_increment or 1))
-    if partial_ladder_state is not None and hasattr(pos, "partial_ladder_state"):
+    if partial_ladder_state is not None and _POS_HAS["partial_ladder_state"]:
         try:
             pos.partial_ladder_state = runner_ladder.encode_ladder_state(partial_ladder_state)
             runner_ladder.write_position_state(str(getattr(pos, "id", None) or getattr(pos, "address", "")), partial_ladder_state)
         except Exception:
             log.debug("partial_ladder_state persist failed for %s", getattr(pos, "address", "")[:6], exc_info=True)
-    if hasattr(pos, "first_partial_at") and getattr(pos, "first_partial_at", None) is None:
+    if _POS_HAS["first_partial_at"] and getattr(pos, "first_partial_at", None) is None:
         pos.first_partial_at = filled_at
-    if hasattr(pos, "last_partial_at"):
+    if _POS_HAS["last_partial_at"]:
         pos.last_partial_at = filled_at
-    if hasattr(pos, "last_partial_qty"):
+    if _POS_HAS["last_partial_qty"]:
         pos.last_partial_qty = sold_qty
-    if hasattr(pos, "last_partial_price_usd"):
+    if _POS_HAS["last_partial_price_usd"]:
         pos.last_partial_price_usd = fill_px
     partial_age_s = _seconds_from_opened_at(getattr(pos, "opened_at", None), filled_at)
-    if partial_age_s is not None and hasattr(pos, "time_to_partial_sec") and getattr(pos, "time_to_partial_sec", None) is None:
+    if partial_age_s is not None and _POS_HAS["time_to_partial_sec"] and getattr(pos, "time_to_partial_sec", None) is None:
         pos.time_to_partial_sec = partial_age_s
-    if hasattr(pos, "peak_after_partial_pct"):
+    if _POS_HAS["peak_after_partial_pct"]:
         pos.peak_after_partial_pct = max(
             float(getattr(pos, "peak_after_partial_pct", 0.0) or 0.0),
             float(getattr(pos, "highest_pnl_pct", 0.0) or 0.0),
@@ -5940,11 +6403,11 @@ def _refresh_position_trade_metrics(pos: Position) -> bool:
         realized_proceeds_usd=getattr(pos, "realized_proceeds_usd", 0.0),
         close_price_usd=None,
     )
-    if hasattr(pos, "entry_qty"):
+    if _POS_HAS["entry_qty"]:
         pos.entry_qty = int(totals.entry_qty)
-    if hasattr(pos, "realized_cost_usd"):
+    if _POS_HAS["realized_cost_usd"]:
         pos.realized_cost_usd = float(totals.realized_cost_usd)
-    if hasattr(pos, "realized_pnl_usd"):
+    if _POS_HAS["realized_pnl_usd"]:
         pos.realized_pnl_usd = float(totals.realized_pnl_usd)
     after = (
         int(getattr(pos, "entry_qty", 0) or 0),
@@ -5967,249 +6430,492 @@ def _seal_closed_trade_metrics(pos: Position, close_price_usd: Optional[float])
         close_price_usd=close_px,
     )
 
-    if hasattr(pos, "entry_qty"):
+    if _POS_HAS["entry_qty"]:
         pos.entry_qty = int(totals.entry_qty)
-    if hasattr(pos, "realized_cost_usd"):
+    if _POS_HAS["realized_cost_usd"]:
         pos.realized_cost_usd = float(totals.realized_cost_usd)
-    if hasattr(pos, "realized_pnl_usd"):
+    if _POS_HAS["realized_pnl_usd"]:
         pos.realized_pnl_usd = float(totals.realized_pnl_usd)
-    if hasattr(pos, "effective_exit_price_usd"):
+    if _POS_HAS["effective_exit_price_usd"]:
         pos.effective_exit_price_usd = totals.effective_exit_price_usd
-    if hasattr(pos, "total_pnl_usd"):
+    if _POS_HAS["total_pnl_usd"]:
         pos.total_pnl_usd = float(totals.total_pnl_usd)
-    if hasattr(pos, "total_pnl_pct"):
+    if _POS_HAS["total_pnl_pct"]:
         pos.total_pnl_pct = float(totals.total_pnl_pct)
     _finalize_position_runner_metrics(pos)
     pos.qty = 0
 
 
-async def _check_positions(ses: SessionLocal) -> None:
-    """Revisa posiciones abiertas y ejecuta ventas cuando corresponde."""
-    import os
+_NON_JUP_BUY_SRCS = frozenset({"dexscreener", "sol_estimate"})
+# Columnas opcionales según versión del modelo → se resuelven una vez sobre la clase
+_POS_HAS_PRICE_SOURCE_AT_CLOSE = hasattr(Position, "price_source_at_close")
+_POS_HAS_EXIT_TX_SIG = hasattr(Position, "exit_tx_sig")
+# Ídem para los guards de columnas opcionales en compra/peak/parciales/cierre
+_POS_HAS: Dict[str, bool] = {
+    name: hasattr(Position, name)
+    for name in (
+        "buy_tx_sig",
+        "effective_exit_price_usd",
+        "entry_qty",
+        "exit_from_peak_giveback_pct",
+        "first_partial_at",
+        "last_partial_at",
+        "last_partial_price_usd",
+        "last_partial_qty",
+        "liq_at_buy_usd",
+        "max_pnl_pct_seen",
+        "partial_count",
+        "partial_ladder_state",
+        "partial_taken",
+        "peak_after_partial_pct",
+        "peak_price",
+        "peak_price_usd",
+        "price_source_at_buy",
+        "realized_cost_usd",
+        "realized_pnl_usd",
+        "realized_proceeds_usd",
+        "realized_qty",
+        "time_to_partial_sec",
+        "time_to_peak_sec",
+        "token_mint",
+        "total_pnl_pct",
+        "total_pnl_usd",
+    )
+}
 
-    global _wallet_sol_balance
+# Contenedores por ciclo del monitor: se vacían (no se recrean) en cada pasada.
+# _check_positions nunca corre en paralelo consigo mismo (un solo main_loop).
+_MON_CONSULT_COUNTS: Counter[str] = Counter()
+_MON_CLOSE_COUNTS: Counter[str] = Counter()
+_MON_PENDING_SELLS: List[Dict[str, Any]] = []
+# ¿Alguna posición en zona crítica en la última pasada? (acorta el sleep del loop)
+_MON_NEAR_EXIT = False
 
-    positions = await _load_open_positions(ses)
-    if not positions:
-        return
 
-    # ── límites de sondeo crítico por ciclo ─────────────────────────────
-    try:
-        _CRIT_MAX = max(int(os.getenv("CRIT_PRICE_MAX_PER_CYCLE", "4")), 0)
-    except Exception:
-        _CRIT_MAX = 4
-    try:
-        _CRIT_BOOTSTRAP_MIN = max(int(os.getenv("CRIT_BOOTSTRAP_MIN", "20")), 0)
-    except Exception:
-        _CRIT_BOOTSTRAP_MIN = 20
+def _buy_was_non_jup(p: Position) -> bool:
+    """True si el precio de compra no vino de Jupiter (monitor → Dex primero)."""
+    return (getattr(p, "price_source_at_buy", None) or "") in _NON_JUP_BUY_SRCS
 
-    def _near_exit_zone(pos: Position, now: dt.datetime) -> bool:
-        opened_raw = getattr(pos, "opened_at", None)
-        if opened_raw is None:
-            return True
 
-        opened: dt.datetime | None = None
+async def _probe_dex_full(mint_key: str, *, with_liq: bool = False) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Dex/GT → (price, liq). Con `with_liq` pide el payload completo para que la
+    misma respuesta sirva de precio y de liquidez (sin segunda llamada).
+    """
+    try:
+        tok_full = await price_service.get_price(mint_key, use_gt=True, price_only=not with_liq)
+    except Exception:
+        return None, None
+    if not tok_full:
+        return None, None
+    price = float(tok_full["price_usd"]) if tok_full.get("price_usd") else None
+    liq = tok_full.get("liquidity_usd")
+    if with_liq and liq is not None:
         try:
-            if isinstance(opened_raw, dt.datetime):
-                opened = opened_raw if opened_raw.tzinfo else opened_raw.replace(tzinfo=dt.timezone.utc)
-            elif isinstance(opened_raw, str):
-                opened = parse_iso_utc(opened_raw)
+            liq = float(liq or 0.0)
         except Exception:
-            opened = None
+            liq = None
+    return price, liq
 
-        if opened is None:
-            return True
 
-        age_min = (now - opened).total_seconds() / 60.0
-        if age_min <= _CRIT_BOOTSTRAP_MIN:
-            return True
+async def _probe_jup_single(mint_key: str) -> Optional[float]:
+    try:
+        return await price_service.get_price_usd(mint_key)
+    except Exception:
+        return None
 
-        try:
-            return (pos.highest_pnl_pct or 0.0) > 0.0
-        except Exception:
-            return False
 
-    def _buy_was_non_jup(p: Position) -> bool:
-        src = getattr(p, "price_source_at_buy", None) or ""
-        return src in {"dexscreener", "sol_estimate"}
+async def _probe_jup_critical(mint_key: str) -> Optional[float]:
+    try:
+        return await price_service.get_price_usd(mint_key, critical=True)
+    except TypeError:
+        return await _probe_jup_single(mint_key)
+    except Exception:
+        return None
 
-    # ① Preload batch de precios
-    addr_list = [
-        (getattr(p, "token_mint", None) or p.address)
-        for p in positions
-        if (getattr(p, "token_mint", None) or p.address)
-    ]
-    batch_prices: Dict[str, float] = await _prefetch_batch_prices(addr_list)
 
-    # Métricas por ciclo
-    total = len(positions)
-    batch_resolved = 0
-    fallback_resolved = 0
-    critical_resolved = 0
-    dex_full_resolved = 0
-    no_price = 0
+async def _resolve_position_price(
+    mint_key: str,
+    batch_price: Optional[float],
+    *,
+    prefer_dex: bool,
+    take_crit_slot,
+    need_liq: bool,
+) -> Tuple[Optional[float], Optional[str], Optional[float]]:
+    """
+    Resuelve (price, price_src, liq_now) de una posición abierta.
+
+    Sondas en serie, por prioridad: la siguiente solo se consulta si la
+    anterior no dio precio. No se lanzan en paralelo: `get_price` comparte la
+    petición (single-flight con shield), así que cancelar la sonda sobrante no
+    ahorra su llamada HTTP y gastaría cuota Dex/GT en cada tick. La crítica
+    solo se consume si las demás fallan (`take_crit_slot()` aplica el cupo).
+    """
+    price: Optional[float] = None
+    price_src: Optional[str] = None
+    liq_now: Optional[float] = None
+    dex_probed = False
+
+    if prefer_dex:
+        # dex_full → jup_batch → jup_single → jup_critical
+        dex_price, liq_now = await _probe_dex_full(mint_key, with_liq=need_liq)
+        dex_probed = True
+        if dex_price is not None:
+            price, price_src = dex_price, "dex_full"
+        elif batch_price is not None:
+            price, price_src = batch_price, "jup_batch"
+        else:
+            price = await _probe_jup_single(mint_key)
+            if price is not None:
+                price_src = "jup_single"
+        if price is None and take_crit_slot():
+            price = await _probe_jup_critical(mint_key)
+            if price is not None:
+                price_src = "jup_critical"
+    elif batch_price is not None:
+        price, price_src = batch_price, "jup_batch"
+    else:
+        # jup_single → jup_critical → dex_full
+        price = await _probe_jup_single(mint_key)
+        if price is not None:
+            price_src = "jup_single"
+        elif take_crit_slot():
+            price = await _probe_jup_critical(mint_key)
+            if price is not None:
+                price_src = "jup_critical"
+        if price is None:
+            dex_price, liq_now = await _probe_dex_full(mint_key, with_liq=need_liq)
+            dex_probed = True
+            if dex_price is not None:
+                price, price_src = dex_price, "dex_full"
+
+    # ── Liquidity CRUSH proactivo: 1 tick “full” solo si ninguna sonda Dex lo pidió ──
+    if need_liq and not dex_probed:
+        try:
+            tok_full_liq = await price_service.get_price(mint_key, use_gt=True)  # full: puede traer liquidez
+        except Exception:
+            tok_full_liq = None
+        if tok_full_liq:
+            try:
+                liq_now = float(tok_full_liq.get("liquidity_usd") or 0.0)
+            except (AttributeError, TypeError, ValueError):
+                liq_now = None
+
+    return price, price_src, liq_now
+
+
+async def _reload_if_expired(ses: SessionLocal, pos: Position) -> bool:
+    """
+    Un rollback expira *todas* las instancias de la sesión compartida y leer
+    un atributo expirado en AsyncSession lanza MissingGreenlet: si `pos` está
+    expirada se recarga con `ses.refresh`. False si no se pudo recargar.
+    """
+    if not inspect(pos).expired:
+        return True
+    try:
+        await ses.refresh(pos)
+    except SQLAlchemyError:
+        log.exception("refresh tras rollback falló; Position %s queda para el próximo ciclo", inspect(pos).identity)
+        return False
+    return True
+
+
+async def _execute_pending_sells(ses: SessionLocal, pending: List[Dict[str, Any]], *, now: dt.datetime) -> int:
+    """
+    Ejecuta los cierres totales decididos por el monitor: `seller.sell` en
+    paralelo (máx. SELL_CONCURRENCY) y después, en serie y en orden, el
+    cierre de cada Position con su propio commit (una venta hecha no debe
+    depender de que otra falle). Devuelve el nº de ventas completadas.
+
+    Un rollback (aquí o antes, en el monitor) expira también las Position
+    que esperan su cierre: las ventas usan address/qty copiados al encolar y
+    cada Position se recarga si hace falta antes de tocarla.
+    """
+    sell_sem = asyncio.Semaphore(SELL_CONCURRENCY)
+
+    async def _sell_one(item: Dict[str, Any]) -> Dict[str, Any]:
+        async with sell_sem:
+            return await seller.sell(
+                item["address"],
+                item["qty"],
+                token_mint=item["mint_key"],
+                price_hint=item["price_hint"],
+                price_source_hint=item["source_hint"],
+            )
+
+    results = await asyncio.gather(*(_sell_one(item) for item in pending), return_exceptions=True)
+
     sells_done = 0
-    crit_used = 0
+    sol_usd: Optional[float] = None
+    for item, sell_resp in zip(pending, results):
+        pos = item["pos"]
+        addr = item["address"]
+        if not await _reload_if_expired(ses, pos):
+            continue
+        pos_regime = item["regime"]
+        exit_reason = item["reason"]
+        if isinstance(sell_resp, asyncio.CancelledError):
+            raise sell_resp
+        if isinstance(sell_resp, Exception):
+            sell_resp = {"ok": False, "err": repr(sell_resp)}
+
+        # Si falla la venta, NO cierres la posición (evita “closed=true” sin haber vendido)
+        if sell_resp is not None and sell_resp.get("ok") is False:
+            if exit_reason == "LIQUIDITY_CRUSH":
+                log.warning("⚠️ SELL LIQ_CRUSH falló %s: %s", addr[:6], sell_resp.get("err"))
+            else:
+                log.warning("⚠️ SELL falló %s (%s): %s", addr[:6], exit_reason, sell_resp.get("err"))
+            strategy_runtime.record_execution(pos_regime, False)
+            log_execution_event(
+                addr,
+                regime=pos_regime,
+                side="sell",
+                ok=False,
+                venue=str((sell_resp or {}).get("venue") or "") or None,
+                signature=str((sell_resp or {}).get("signature") or "") or None,
+            )
+            continue
+
+        strategy_runtime.record_execution(pos_regime, True)
+        log_execution_event(
+            addr,
+            regime=pos_regime,
+            side="sell",
+            ok=True,
+            venue=str((sell_resp or {}).get("venue") or "") or None,
+            signature=str((sell_resp or {}).get("signature") or "") or None,
+        )
 
-    positions_with_price = 0
-    positions_without_price = 0
+        pos.closed = True
+        pos.closed_at = now
+        pos.exit_reason = exit_reason[:24]
 
-    consult_source_counts = {"jup_batch": 0, "jup_single": 0, "jup_critical": 0, "dex_full": 0, "none": 0}
-    close_source_counts   = {"jup_batch": 0, "jup_single": 0, "jup_critical": 0, "dex_full": 0, "fallback_buy": 0, "none": 0}
+        # Precio realmente usado para cerrar (si seller lo resolvió)
+        used_close  = (sell_resp or {}).get("price_used_usd")
+        used_source = (sell_resp or {}).get("price_source_close")
 
-    for pos in positions:
-        now = utc_now()
-        await _ensure_position_entry_notional(pos, ses)
-        mint_key = getattr(pos, "token_mint", None) or pos.address
-        pos_regime = str(getattr(pos, "entry_regime", None) or exit_policy.resolve_entry_regime(pos))
+        # Persistencia de precio de cierre y fuente
+        pos.close_price_usd = item["close_fallback"]
+        if used_close is not None:
+            try:
+                pos.close_price_usd = float(used_close)  # incluye fallback_buy si aplicó
+            except (TypeError, ValueError):
+                pass
 
-        price_src = None
-        price: Optional[float] = None
-        liq_now: Optional[float] = None
-        prefer_dex = _buy_was_non_jup(pos)
+        if _POS_HAS_PRICE_SOURCE_AT_CLOSE:
+            pos.price_source_at_close = used_source or item["source_hint"] or None
+        if _POS_HAS_EXIT_TX_SIG:
+            pos.exit_tx_sig = (sell_resp or {}).get("signature")
+        _seal_closed_trade_metrics(pos, pos.close_price_usd)
 
-        # FORZAR Jupiter-first si el flag está activo
-        if FORCE_JUP_IN_MONITOR:
-            prefer_dex = False
+        try:
+            await ses.commit()
+        except SQLAlchemyError:
+            log.exception("commit del cierre de %s falló; la Position sigue abierta en BD", addr[:6])
+            await ses.rollback()
+            continue
 
-        if prefer_dex:
-            # 1) Dex/GT (SOLO PRECIO, puede traer liq si está disponible)
-            tok_full = None
+        # solo se cuenta/reporta como cerrada si el cierre quedó en BD
+        runner_turbo_monitor.mark_closed(addr, now=now)
+        _record_sell_stat(now)
+        sells_done += 1
+        _OPEN_POSITIONS.discard(addr)
+        if DRY_RUN and exit_reason != "LIQUIDITY_CRUSH":
             try:
-                tok_full = await price_service.get_price(mint_key, use_gt=True, price_only=True)
+                refresh_post_partial_experiment_snapshot()
             except Exception:
-                tok_full = None
-            if tok_full and tok_full.get("price_usd"):
-                price = float(tok_full["price_usd"])
-                liq_now = tok_full.get("liquidity_usd")
-                price_src = "dex_full"
-                dex_full_resolved += 1
-
-            # 2) Jupiter batch → single → critical
-            if price is None:
-                p_b = batch_prices.get(mint_key)
-                if p_b is not None:
-                    price = p_b
-                    price_src = "jup_batch"
-                    batch_resolved += 1
+                log.exception("post-partial experiment snapshot refresh failed")
 
-            if price is None:
+        # Persistencia dataset al cierre
+        _persist_dataset_at_close(pos, used_close if used_close is not None else item["price_hint"])
+        research_runtime.record_live_trade_close(
+            addr,
+            regime=pos_regime,
+            pnl_pct=getattr(pos, "total_pnl_pct", None),
+            exit_reason=exit_reason,
+            extra={
+                "price_source_at_close": getattr(pos, "price_source_at_close", None),
+                "close_price_usd": getattr(pos, "close_price_usd", None),
+                **_position_health_metadata(pos),
+                **_position_research_metrics(pos),
+            },
+        )
+        strategy_runtime.record_trade_close(
+            pos_regime,
+            getattr(pos, "total_pnl_pct", None),
+            exit_reason=exit_reason,
+            execution_state=_position_execution_state(pos),
+            **_position_health_metadata(pos),
+        )
+        if (
+            (not DRY_RUN)
+            and exit_reason != "LIQUIDITY_CRUSH"
+            and str(getattr(pos, "entry_lane", "") or "").strip().lower() == "pump_early_green_candle_sniper"
+        ):
+            if sol_usd is None:
                 try:
-                    p_s = await price_service.get_price_usd(mint_key)
+                    sol_usd = float(await get_sol_usd())
                 except Exception:
-                    p_s = None
-                if p_s is not None:
-                    price = p_s
-                    price_src = "jup_single"
-                    fallback_resolved += 1
+                    sol_usd = 1.0
+            live_canary.record_green_live_close(
+                pnl_sol=float(getattr(pos, "total_pnl_usd", 0.0) or 0.0) / max(sol_usd, 1.0),
+                exit_reason=exit_reason,
+            )
 
-            if price is None and crit_used < _CRIT_MAX and _near_exit_zone(pos, now):
-                try:
-                    p_c = await price_service.get_price_usd(mint_key, critical=True)
-                except TypeError:
-                    try:
-                        p_c = await price_service.get_price_usd(mint_key)
-                    except Exception:
-                        p_c = None
-                except Exception:
-                    p_c = None
-                if p_c is not None:
-                    price = p_c
-                    price_src = "jup_critical"
-                    critical_resolved += 1
-                crit_used += 1
+    # ✅ Fix: NO sumar “a ojo”. Refresco balance real tras el lote de ventas.
+    if sells_done and not DRY_RUN:
+        await _refresh_balance_force("after_sell")
+    return sells_done
 
-        else:
-            # Camino preferente: Jupiter → Dex/GT
-            price = batch_prices.get(mint_key)
-            if price is not None:
-                price_src = "jup_batch"
-                batch_resolved += 1
-            else:
-                try:
-                    price = await price_service.get_price_usd(mint_key)
-                except Exception:
-                    price = None
-                if price is not None:
-                    price_src = "jup_single"
-                    fallback_resolved += 1
 
-            if price is None and crit_used < _CRIT_MAX and _near_exit_zone(pos, now):
-                try:
-                    price = await price_service.get_price_usd(mint_key, critical=True)
-                except TypeError:
-                    try:
-                        price = await price_service.get_price_usd(mint_key)
-                    except Exception:
-                        price = None
-                except Exception:
-                    price = None
-                if price is not None:
-                    price_src = "jup_critical"
-                    critical_resolved += 1
-                crit_used += 1
+async def _check_positions(ses: SessionLocal) -> None:
+    """Revisa posiciones abiertas y ejecuta ventas cuando corresponde."""
+    global _MON_NEAR_EXIT
+    before = frozenset(_OPEN_POSITIONS)
+    positions = await _load_open_positions(ses)
+    # Columnas de solo lectura materializadas una vez por ciclo: el bucle de
+    # decisión indexa listas/arrays en vez de pasar por los descriptores ORM.
+    addrs = [p.address for p in positions]
+    _sync_open_positions(set(addrs), before)
+    if len(_OPENED_EPOCH_BY_ID) > 2 * len(positions) + 32:
+        open_ids = {p.id for p in positions}
+        for stale_id in [k for k in _OPENED_EPOCH_BY_ID if k not in open_ids]:
+            del _OPENED_EPOCH_BY_ID[stale_id]
+    if not positions:
+        _MON_NEAR_EXIT = False
+        return
 
-            if price is None:
-                tok_full = None
-                try:
-                    tok_full = await price_service.get_price(mint_key, use_gt=True, price_only=True)
-                except Exception:
-                    tok_full = None
-                if tok_full and tok_full.get("price_usd"):
-                    price = float(tok_full["price_usd"])
-                    liq_now = tok_full.get("liquidity_usd")
-                    price_src = "dex_full"
-                    dex_full_resolved += 1
+    def _near_exit_zone(pos: Position, now_epoch: float) -> bool:
+        opened_epoch = _position_opened_epoch(pos)
+        if opened_epoch is None:
+            return True
 
-        # Métricas de cobertura de precio (consulta)
-        if price is None:
-            positions_without_price += 1
-            no_price += 1
-            consult_source_counts["none"] += 1
-        else:
-            positions_with_price += 1
-            consult_source_counts[price_src] = consult_source_counts.get(price_src, 0) + 1  # type: ignore
+        age_min = (now_epoch - opened_epoch) / 60.0
+        if age_min <= _CRIT_BOOTSTRAP_MIN:
+            return True
 
-        strategy_runtime.record_monitor_coverage(pos_regime, price is not None)
+        try:
+            return (pos.highest_pnl_pct or 0.0) > 0.0
+        except TypeError:
+            return False
 
-        # ── Liquidity CRUSH proactivo (si no tenemos liq_now, intenta 1 tick “full”) ──
-        if getattr(pos, "buy_liquidity_usd", None) and (liq_now is None):
+    # ① Preload batch de precios
+    #    (mints internadas: vienen de la DB como strings nuevos en cada ciclo y
+    #    se usan como clave en batch_prices / caches de price_service)
+    mint_keys = [sys.intern(k) if k else k for k in (getattr(p, "token_mint", None) or a for p, a in zip(positions, addrs))]
+    # varias posiciones pueden compartir mint: una sola entrada por mint en el batch
+    addr_list = list(dict.fromkeys(k for k in mint_keys if k))
+    batch_prices: Dict[str, float] = await _prefetch_batch_prices(addr_list)
+
+    # Métricas por ciclo
+    total = len(positions)
+    sells_done = 0
+    crit_used = 0
+
+    # price_src (jup_batch/jup_single/jup_critical/dex_full/none) → nº posiciones
+    consult_source_counts = _MON_CONSULT_COUNTS
+    consult_source_counts.clear()
+    # Cierres totales decididos en este ciclo (se ejecutan tras evaluar todas)
+    pending_sells = _MON_PENDING_SELLS
+    pending_sells.clear()
+    close_source_counts = _MON_CLOSE_COUNTS
+    close_source_counts.clear()
+
+    def _take_crit_slot(pos: Position, now_epoch: float) -> bool:
+        nonlocal crit_used
+        if crit_used < _CRIT_MAX and _near_exit_zone(pos, now_epoch):
+            crit_used += 1
+            return True
+        return False
+
+    # Un único reloj por ciclo (la precisión sub-segundo por posición no aporta)
+    now = utc_now()
+    now_epoch = now.timestamp()
+    _MON_NEAR_EXIT = any(_near_exit_zone(p, now_epoch) for p in positions)
+
+    # ② Resolución de precios en paralelo (acotada); ventas/commits siguen en serie
+    price_sem = asyncio.Semaphore(MONITOR_PRICE_CONCURRENCY)
+
+    # Lecturas ORM que se usan en ambas fases → una sola vez por posición
+    buy_liqs = [getattr(p, "buy_liquidity_usd", None) for p in positions]
+    need_liqs = [bool(b) and _MONITOR_NEEDS_LIQ for b in buy_liqs]
+
+    async def _resolve(
+        pos: Position, mint_key: str, need_liq: bool,
+    ) -> Tuple[Optional[float], Optional[str], Optional[float]]:
+        async with price_sem:
             try:
-                tok_full_liq = await price_service.get_price(mint_key, use_gt=True)  # full: puede traer liquidez
+                return await _resolve_position_price(
+                    mint_key,
+                    batch_prices.get(mint_key),
+                    # FORZAR Jupiter-first si el flag está activo
+                    prefer_dex=_buy_was_non_jup(pos) and not FORCE_JUP_IN_MONITOR,
+                    take_crit_slot=lambda: _take_crit_slot(pos, now_epoch),
+                    need_liq=need_liq,
+                )
+            except Exception as exc:
+                log.debug("resolve price %s → %s", str(mint_key)[:6], exc)
+                return None, None, None
+
+    # Peak/pnl y runner_exit_profile solo ensucian la sesión: un commit por
+    # ciclo (o antes de vender, para que un rollback no los descarte).
+    metrics_dirty = False
+
+    async def _commit_metrics() -> None:
+        nonlocal metrics_dirty
+        if not metrics_dirty:
+            return
+        metrics_dirty = False
+        try:
+            await ses.commit()
+        except Exception:
+            try:
+                await ses.rollback()
             except Exception:
-                tok_full_liq = None
-            if tok_full_liq:
-                try:
-                    liq_now = float(tok_full_liq.get("liquidity_usd") or 0.0)
-                except Exception:
-                    liq_now = None
+                pass
+
+    resolved = await asyncio.gather(*(_resolve(*args) for args in zip(positions, mint_keys, need_liqs)))
+
+    # pnl% de todas las posiciones en una pasada vectorizada (NaN → sin precio
+    # o sin precio de compra); la política de salida sigue siendo por posición.
+    buy_px_arr = np.fromiter((float(p.buy_price_usd or 0.0) for p in positions), dtype=np.float64, count=total)
+    px_arr = np.fromiter((np.nan if r[0] is None else float(r[0]) for r in resolved), dtype=np.float64, count=total)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_arr = np.where(buy_px_arr != 0.0, (px_arr - buy_px_arr) / buy_px_arr * 100.0, np.nan)
+
+    for i, (pos, addr, mint_key, buy_liq, (price, price_src, liq_now)) in enumerate(
+        zip(positions, addrs, mint_keys, buy_liqs, resolved)
+    ):
+        if not await _reload_if_expired(ses, pos):
+            continue
+        await _ensure_position_entry_notional(pos, ses)
+        pos_regime = str(getattr(pos, "entry_regime", None) or exit_policy.resolve_entry_regime(pos))
+
+        # Métricas de cobertura de precio (consulta)
+        consult_source_counts[price_src if price is not None else "none"] += 1
+
+        strategy_runtime.record_monitor_coverage(pos_regime, price is not None)
 
         # ── Actualizar pnl_pct + peak (si hay precio) ───────────────────
         pnl_pct: Optional[float] = None
-        if price is not None and pos.buy_price_usd:
+        if (pnl_v := pnl_arr[i]) == pnl_v:
+            pnl_pct = float(pnl_v)
             try:
-                pnl_pct = (float(price) - float(pos.buy_price_usd)) / float(pos.buy_price_usd) * 100.0
-                if _update_position_peak_metrics(pos, pnl_pct=float(pnl_pct), price_usd=float(price), observed_at=now):
-                    try:
-                        await ses.commit()
-                    except Exception:
-                        try:
-                            await ses.rollback()
-                        except Exception:
-                            pass
+                if _update_position_peak_metrics(pos, pnl_pct=pnl_pct, price_usd=float(price), observed_at=now):
+                    metrics_dirty = True
             except Exception:
                 pnl_pct = None
 
         if pnl_pct is not None:
             try:
                 runner_turbo_monitor.observe_position(
-                    pos.address,
+                    addr,
                     peak_pct=float(getattr(pos, "highest_pnl_pct", 0.0) or 0.0),
                     dry_run=DRY_RUN,
                     now=now,
                 )
             except Exception:
-                log.debug("runner turbo observe failed for %s", pos.address[:6], exc_info=True)
+                log.debug("runner turbo observe failed for %s", addr[:6], exc_info=True)
 
         pos_exit_policy = exit_policy.effective_exit_policy(pos)
         if (
@@ -6217,114 +6923,28 @@ async def _check_positions(ses: SessionLocal) -> None:
             and getattr(pos, "runner_exit_profile", None) != pos_exit_policy.runner_exit_profile
         ):
             pos.runner_exit_profile = pos_exit_policy.runner_exit_profile
-            try:
-                await ses.commit()
-            except Exception:
-                try:
-                    await ses.rollback()
-                except Exception:
-                    pass
+            metrics_dirty = True
 
         # ── Liquidity crush inmediato (manteniendo tu comportamiento) ────
+        # Guardas baratas primero; los float() solo si hay liq_now y liq de compra.
         if (
-            getattr(pos, "buy_liquidity_usd", None)
+            buy_liq
             and liq_now
-            and not (bool(getattr(pos, "partial_taken", False)) and price is not None)
-            and float(pos_exit_policy.liq_crush_fraction) > 0
-            and float(liq_now) <= float(pos.buy_liquidity_usd) * float(pos_exit_policy.liq_crush_fraction)
+            and not (price is not None and bool(getattr(pos, "partial_taken", False)))
+            and (crush_frac := float(pos_exit_policy.liq_crush_fraction)) > 0
+            and float(liq_now) <= float(buy_liq) * crush_frac
         ):
-            sell_resp = await seller.sell(
-                pos.address,
-                pos.qty,
-                token_mint=mint_key,
-                price_hint=price,
-                price_source_hint=price_src,
-            )
-
-            # Si falla la venta, NO cierres (evita “closed=true” sin haber vendido)
-            if sell_resp is not None and sell_resp.get("ok") is False:
-                log.warning("⚠️ SELL LIQ_CRUSH falló %s: %s", pos.address[:6], sell_resp.get("err"))
-                strategy_runtime.record_execution(pos_regime, False)
-                log_execution_event(
-                    pos.address,
-                    regime=pos_regime,
-                    side="sell",
-                    ok=False,
-                    venue=str((sell_resp or {}).get("venue") or "") or None,
-                    signature=str((sell_resp or {}).get("signature") or "") or None,
-                )
-                try:
-                    await ses.rollback()
-                except Exception:
-                    pass
-                continue
-
-            strategy_runtime.record_execution(pos_regime, True)
-            log_execution_event(
-                pos.address,
-                regime=pos_regime,
-                side="sell",
-                ok=True,
-                venue=str((sell_resp or {}).get("venue") or "") or None,
-                signature=str((sell_resp or {}).get("signature") or "") or None,
-            )
-
-            pos.closed = True
-            pos.closed_at = now
-            pos.exit_reason = "LIQUIDITY_CRUSH"
-
-            used_close  = (sell_resp or {}).get("price_used_usd")
-            used_source = (sell_resp or {}).get("price_source_close")
-
-            if used_close is not None:
-                try:
-                    pos.close_price_usd = float(used_close)
-                except Exception:
-                    pos.close_price_usd = price if price is not None else None
-            else:
-                pos.close_price_usd = price if price is not None else pos.buy_price_usd
-
-            if hasattr(pos, "price_source_at_close"):
-                pos.price_source_at_close = used_source or price_src or None
-            if hasattr(pos, "exit_tx_sig"):
-                pos.exit_tx_sig = (sell_resp or {}).get("signature")
-
-            _seal_closed_trade_metrics(pos, pos.close_price_usd)
-
-            try:
-                await ses.commit()
-            except SQLAlchemyError:
-                await ses.rollback()
-
-            # Persistencia dataset al cierre
-            _persist_dataset_at_close(pos, used_close if used_close is not None else price)
-            research_runtime.record_live_trade_close(
-                pos.address,
-                regime=pos_regime,
-                pnl_pct=getattr(pos, "total_pnl_pct", None),
-                exit_reason="LIQUIDITY_CRUSH",
-                extra={
-                    "price_source_at_close": getattr(pos, "price_source_at_close", None),
-                    "close_price_usd": getattr(pos, "close_price_usd", None),
-                    **_position_health_metadata(pos),
-                    **_position_research_metrics(pos),
-                },
-            )
-            strategy_runtime.record_trade_close(
-                pos_regime,
-                getattr(pos, "total_pnl_pct", None),
-                exit_reason="LIQUIDITY_CRUSH",
-                execution_state=_position_execution_state(pos),
-                **_position_health_metadata(pos),
-            )
-
-            # ✅ Fix: NO sumar “a ojo”. Refresco balance real tras trade.
-            if not DRY_RUN:
-                await _refresh_balance_force("after_sell_liq_crush")
-
-            runner_turbo_monitor.mark_closed(pos.address, now=now)
-            _record_sell_stat(now)
-            sells_done += 1
+            pending_sells.append({
+                "pos": pos,
+                "address": addr,
+                "qty": pos.qty,
+                "mint_key": mint_key,
+                "regime": pos_regime,
+                "reason": "LIQUIDITY_CRUSH",
+                "price_hint": price,
+                "source_hint": price_src,
+                "close_fallback": price if price is not None else pos.buy_price_usd,
+            })
             continue  # siguiente posición
 
         # ── TP parcial / ladder paper al tocar umbrales (antes de salida total) ──
@@ -6353,14 +6973,15 @@ async def _check_positions(ses: SessionLocal) -> None:
                 if qty_to_sell > 0:
                     log.info(
                         "💰 TP parcial %s pnl=%s%% → vendiendo %d/%d (%.0f%%)",
-                        (pos.symbol or pos.address[:6]),
+                        (pos.symbol or addr[:6]),
                         _fmt(pnl_pct, "{:.1f}"),
                         qty_to_sell,
                         qty_total,
                         sell_fraction * 100.0,
                     )
+                    await _commit_metrics()
                     part_resp = await seller.sell(
-                        pos.address,
+                        addr,
                         qty_to_sell,
                         token_mint=mint_key,
                         price_hint=price,
@@ -6368,26 +6989,23 @@ async def _check_positions(ses: SessionLocal) -> None:
                     )
 
                     if part_resp is not None and part_resp.get("ok") is False:
-                        log.warning("⚠️ TP parcial falló %s: %s", pos.address[:6], part_resp.get("err"))
+                        log.warning("⚠️ TP parcial falló %s: %s", addr[:6], part_resp.get("err"))
                         strategy_runtime.record_execution(pos_regime, False)
                         log_execution_event(
-                            pos.address,
+                            addr,
                             regime=pos_regime,
                             side="sell_partial",
                             ok=False,
                             venue=str((part_resp or {}).get("venue") or "") or None,
                             signature=str((part_resp or {}).get("signature") or "") or None,
                         )
-                        try:
-                            await ses.rollback()
-                        except Exception:
-                            pass
+                        # nada mutado (métricas ya commiteadas): sin rollback;
                         # no cierres en este tick; reintenta luego
                         continue
 
                     strategy_runtime.record_execution(pos_regime, True)
                     log_execution_event(
-                        pos.address,
+                        addr,
                         regime=pos_regime,
                         side="sell_partial",
                         ok=True,
@@ -6408,39 +7026,39 @@ async def _check_positions(ses: SessionLocal) -> None:
                         else None,
                     )
 
-                    try:
-                        await ses.commit()
-                    except Exception:
-                        try:
-                            await ses.rollback()
-                        except Exception:
-                            pass
-
-                    # refresco real (solo modo real)
-                    if not DRY_RUN:
-                        await _refresh_balance_force("after_partial_tp")
-
                     # si por cualquier razón quedó a 0, lo tratamos como cierre total
-                    if int(getattr(pos, "qty", 0) or 0) <= 0:
+                    # (se decide antes de persistir → un único commit por parcial)
+                    closed_by_partial = int(getattr(pos, "qty", 0) or 0) <= 0
+                    if closed_by_partial:
                         pos.closed = True
                         pos.closed_at = now
                         pos.exit_reason = "TAKE_PROFIT"
                         try:
                             pos.close_price_usd = float(part_price_used) if part_price_used is not None else (float(price) if price is not None else pos.buy_price_usd)
-                        except Exception:
+                        except (TypeError, ValueError):
                             pos.close_price_usd = pos.buy_price_usd
-                        if hasattr(pos, "price_source_at_close"):
+                        if _POS_HAS_PRICE_SOURCE_AT_CLOSE:
                             pos.price_source_at_close = (part_resp or {}).get("price_source_close") or price_src or None
-                        if hasattr(pos, "exit_tx_sig"):
+                        if _POS_HAS_EXIT_TX_SIG:
                             pos.exit_tx_sig = (part_resp or {}).get("signature")
                         _seal_closed_trade_metrics(pos, pos.close_price_usd)
+
+                    try:
+                        await ses.commit()
+                    except Exception:
                         try:
-                            await ses.commit()
+                            await ses.rollback()
                         except Exception:
-                            try:
-                                await ses.rollback()
-                            except Exception:
-                                pass
+                            pass
+                    else:
+                        if closed_by_partial:
+                            _OPEN_POSITIONS.discard(addr)
+
+                    # refresco real (solo modo real)
+                    if not DRY_RUN:
+                        await _refresh_balance_force("after_partial_tp")
+
+                    if closed_by_partial:
                         if DRY_RUN:
                             try:
                                 refresh_post_partial_experiment_snapshot()
@@ -6448,7 +7066,7 @@ async def _check_positions(ses: SessionLocal) -> None:
                                 log.exception("post-partial experiment snapshot refresh failed")
                         _persist_dataset_at_close(pos, price)
                         research_runtime.record_live_trade_close(
-                            pos.address,
+                            addr,
                             regime=pos_regime,
                             pnl_pct=getattr(pos, "total_pnl_pct", None),
                             exit_reason="TAKE_PROFIT",
@@ -6466,7 +7084,7 @@ async def _check_positions(ses: SessionLocal) -> None:
                             execution_state=_position_execution_state(pos),
                             **_position_health_metadata(pos),
                         )
-                        runner_turbo_monitor.mark_closed(pos.address, now=now)
+                        runner_turbo_monitor.mark_closed(addr, now=now)
                         _record_sell_stat(now)
                         sells_done += 1
                     continue  # tras parcial, NO cierres en este tick
@@ -6489,7 +7107,7 @@ async def _check_positions(ses: SessionLocal) -> None:
                 ):
                     record_runtime_event(
                         "missed_partial_due_to_tick_gap",
-                        pos.address,
+                        addr,
                         entry_lane=getattr(pos, "entry_lane", None),
                         gate_profile=getattr(pos, "gate_profile", None),
                         peak_pct=peak_for_partial,
@@ -6497,15 +7115,23 @@ async def _check_positions(ses: SessionLocal) -> None:
                         pending_steps=peak_plan.get("triggered_steps") or [],
                     )
             except Exception:
-                log.debug("missed partial tick-gap audit failed for %s", pos.address[:6], exc_info=True)
+                log.debug("missed partial tick-gap audit failed for %s", addr[:6], exc_info=True)
+
+        # Sin precio, exit_policy solo puede disparar TIMEOUT_NOPRICE (max_holding_h)
+        if price is None:
+            opened_epoch = _position_opened_epoch(pos)
+            if opened_epoch is None or now_epoch - opened_epoch < float(pos_exit_policy.max_holding_h) * 3600.0:
+                continue
 
-        exit_reason = await _should_exit(pos, price, now, liq_now=liq_now, pnl_pct=pnl_pct)
+        exit_reason = await _should_exit(
+            pos, price, now, liq_now=liq_now, pnl_pct=pnl_pct, now_epoch=now_epoch,
+        )
         if exit_reason is None:
             continue
 
         try:
             runner_turbo_monitor.record_close_triggered(
-                pos.address,
+                addr,
                 reason=str(exit_reason),
                 peak_pct=float(getattr(pos, "highest_pnl_pct", 0.0) or 0.0),
                 pnl_pct=float(pnl_pct or 0.0),
@@ -6513,7 +7139,7 @@ async def _check_positions(ses: SessionLocal) -> None:
                 now=now,
             )
         except Exception:
-            log.debug("runner turbo close trigger event failed for %s", pos.address[:6], exc_info=True)
+            log.debug("runner turbo close trigger event failed for %s", addr[:6], exc_info=True)
 
         sell_price_hint = price
         sell_price_source_hint = price_src
@@ -6530,7 +7156,7 @@ async def _check_positions(ses: SessionLocal) -> None:
                         sell_price_hint = floor_price
                         sell_price_source_hint = "dynamic_runner_floor"
             except Exception:
-                log.debug("dynamic runner floor price hint failed for %s", pos.address[:6], exc_info=True)
+                log.debug("dynamic runner floor price hint failed for %s", addr[:6], exc_info=True)
 
         # ④ SELL — seller.sell hará su propio cálculo robusto de precio
         if DRY_RUN and str(exit_reason) in {"POST_PARTIAL_TRAILING", "POST_PARTIAL_STOP"}:
@@ -6546,150 +7172,58 @@ async def _check_positions(ses: SessionLocal) -> None:
                         sell_price_hint = floor_price
                         sell_price_source_hint = "post_partial_protection_floor"
             except Exception:
-                log.debug("post-partial floor price hint failed for %s", pos.address[:6], exc_info=True)
-
-        sell_resp = await seller.sell(
-            pos.address,
-            pos.qty,
-            token_mint=mint_key,
-            price_hint=sell_price_hint,            # el que calculaste en el monitor (puede ser None)
-            price_source_hint=sell_price_source_hint, # "jup_batch" | "jup_single" | "jup_critical" | "dex_full" | None
-        )
-
-        # Si falla la venta, NO cierres la posición
-        if sell_resp is not None and sell_resp.get("ok") is False:
-            log.warning("⚠️ SELL falló %s (%s): %s", pos.address[:6], exit_reason, sell_resp.get("err"))
-            strategy_runtime.record_execution(pos_regime, False)
-            log_execution_event(
-                pos.address,
-                regime=pos_regime,
-                side="sell",
-                ok=False,
-                venue=str((sell_resp or {}).get("venue") or "") or None,
-                signature=str((sell_resp or {}).get("signature") or "") or None,
-            )
-            try:
-                await ses.rollback()
-            except Exception:
-                pass
-            continue
-
-        strategy_runtime.record_execution(pos_regime, True)
-        log_execution_event(
-            pos.address,
-            regime=pos_regime,
-            side="sell",
-            ok=True,
-            venue=str((sell_resp or {}).get("venue") or "") or None,
-            signature=str((sell_resp or {}).get("signature") or "") or None,
-        )
-
-        pos.closed = True
-        pos.closed_at = now
-        pos.exit_reason = str(exit_reason)[:24]
-
-        # Precio realmente usado para cerrar (si seller lo resolvió)
-        used_close  = (sell_resp or {}).get("price_used_usd")
-        used_source = (sell_resp or {}).get("price_source_close")
-
-        # Persistencia de precio de cierre y fuente
-        if used_close is not None:
-            try:
-                pos.close_price_usd = float(used_close)  # incluye fallback_buy si aplicó
-            except Exception:
-                pos.close_price_usd = sell_price_hint if sell_price_hint is not None else None
-        else:
-            pos.close_price_usd = sell_price_hint if sell_price_hint is not None else None
-
-        if hasattr(pos, "price_source_at_close"):
-            pos.price_source_at_close = used_source or sell_price_source_hint or None
-
-        pos.exit_tx_sig = (sell_resp or {}).get("signature")
-        _seal_closed_trade_metrics(pos, pos.close_price_usd)
-
-        runner_turbo_monitor.mark_closed(pos.address, now=now)
-        _record_sell_stat(now)
-        sells_done += 1
-
+                log.debug("post-partial floor price hint failed for %s", addr[:6], exc_info=True)
+
+        pending_sells.append({
+            "pos": pos,
+            "address": addr,
+            "qty": pos.qty,
+            "mint_key": mint_key,
+            "regime": pos_regime,
+            "reason": str(exit_reason),
+            "price_hint": sell_price_hint,          # el que calculaste en el monitor (puede ser None)
+            "source_hint": sell_price_source_hint,  # "jup_batch" | "jup_single" | "jup_critical" | "dex_full" | None
+            "close_fallback": sell_price_hint,
+        })
+
+    await _commit_metrics()
+
+    # ④ SELL — fase de ejecución: ventas en paralelo (acotadas), cierre en serie.
+    #    seller.sell hará su propio cálculo robusto de precio.
+    if pending_sells:
         try:
-            await ses.commit()
-        except SQLAlchemyError:
-            await ses.rollback()
-        else:
-            if DRY_RUN:
-                try:
-                    refresh_post_partial_experiment_snapshot()
-                except Exception:
-                    log.exception("post-partial experiment snapshot refresh failed")
-
-        # Persistencia dataset al cierre
-        _persist_dataset_at_close(pos, used_close if used_close is not None else sell_price_hint)
-        research_runtime.record_live_trade_close(
-            pos.address,
-            regime=pos_regime,
-            pnl_pct=getattr(pos, "total_pnl_pct", None),
-            exit_reason=str(exit_reason),
-            extra={
-                "price_source_at_close": getattr(pos, "price_source_at_close", None),
-                "close_price_usd": getattr(pos, "close_price_usd", None),
-                **_position_health_metadata(pos),
-                **_position_research_metrics(pos),
-            },
-        )
-        strategy_runtime.record_trade_close(
-            pos_regime,
-            getattr(pos, "total_pnl_pct", None),
-            exit_reason=str(exit_reason),
-            execution_state=_position_execution_state(pos),
-            **_position_health_metadata(pos),
-        )
-        if (not DRY_RUN) and str(getattr(pos, "entry_lane", "") or "").strip().lower() == "pump_early_green_candle_sniper":
-            try:
-                sol_usd = float(await get_sol_usd())
-            except Exception:
-                sol_usd = 1.0
-            live_canary.record_green_live_close(
-                pnl_sol=float(getattr(pos, "total_pnl_usd", 0.0) or 0.0) / max(sol_usd, 1.0),
-                exit_reason=str(exit_reason),
-            )
-
-        # ✅ Fix: NO sumar “a ojo”. Refresco balance real tras trade.
-        if not DRY_RUN:
-            await _refresh_balance_force("after_sell")
+            sells_done += await _execute_pending_sells(ses, pending_sells, now=now)
+        finally:
+            pending_sells.clear()  # no retener Positions (ORM) hasta el próximo ciclo
 
-    # ⑥ Log de métricas del ciclo (salud)
+    # ⑥ Log de métricas del ciclo (salud) — argumentos solo si el nivel emite
     try:
-        pct_with = (positions_with_price / total * 100.0) if total else 0.0
-        pct_without = 100.0 - pct_with if total else 0.0
+        if log.isEnabledFor(logging.INFO):
+            pct_with = ((total - consult_source_counts["none"]) / total * 100.0) if total else 0.0
+            pct_without = 100.0 - pct_with if total else 0.0
 
-        log.info(
-            "📊 Monitor: con precio %.1f%% (sin %.1f%%) | consult srcs: batch=%d single=%d crit=%d dex=%d none=%d | cierres: batch=%d single=%d crit=%d dex=%d fb=%d none=%d | ventas=%d",
-            pct_with, pct_without,
-            consult_source_counts.get("jup_batch", 0),
-            consult_source_counts.get("jup_single", 0),
-            consult_source_counts.get("jup_critical", 0),
-            consult_source_counts.get("dex_full", 0),
-            consult_source_counts.get("none", 0),
-            close_source_counts.get("jup_batch", 0),
-            close_source_counts.get("jup_single", 0),
-            close_source_counts.get("jup_critical", 0),
-            close_source_counts.get("dex_full", 0),
-            close_source_counts.get("fallback_buy", 0),
-            close_source_counts.get("none", 0),
-            sells_done,
-        )
+            cs, cl = consult_source_counts, close_source_counts
+            # ya dentro del guard: se formatea una sola vez, sin el parser %
+            log.info(
+                f"📊 Monitor: con precio {pct_with:.1f}% (sin {pct_without:.1f}%) | "
+                f"consult srcs: batch={cs['jup_batch']} single={cs['jup_single']} crit={cs['jup_critical']} "
+                f"dex={cs['dex_full']} none={cs['none']} | "
+                f"cierres: batch={cl['jup_batch']} single={cl['jup_single']} crit={cl['jup_critical']} "
+                f"dex={cl['dex_full']} fb={cl['fallback_buy']} none={cl['none']} | ventas={sells_done}"
+            )
 
-        log.debug(
-            "📊 Detalle: batch %d/%d, fallback %d, crítico %d/%d, dex_full %d, sin precio %d, ventas %d",
-            batch_resolved,
-            total,
-            fallback_resolved,
-            critical_resolved,
-            _CRIT_MAX,
-            dex_full_resolved,
-            no_price,
-            sells_done,
-        )
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(
+                "📊 Detalle: batch %d/%d, fallback %d, crítico %d/%d, dex_full %d, sin precio %d, ventas %d",
+                consult_source_counts["jup_batch"],
+                total,
+                consult_source_counts["jup_single"],
+                consult_source_counts["jup_critical"],
+                _CRIT_MAX,
+                consult_source_counts["dex_full"],
+                consult_source_counts["none"],
+                sells_done,
+            )
     except Exception:
         pass
 
@@ -7072,10 +7606,24 @@ def _log_strategy_health_snapshot(now: Optional[dt.datetime] = None) -> None:
 
 
 # ╭─────────────────────── Loop de entrenamiento ─────────────────────────────╮
-async def retrain_loop() -> None:
-    import calendar
-    global _runtime_retrain_state
+_RETRAIN_WINDOW = dt.timedelta(minutes=15)
+_RETRAIN_MAX_SLEEP_S = 6 * 3600
+
 
+def _next_retrain_at(after: dt.datetime, *, daily: bool) -> dt.datetime:
+    """
+    Inicio (UTC) de la próxima ventana de retrain cuyo final sea posterior a
+    `after`: RETRAIN_HOUR:00 a diario o el RETRAIN_DAY de la semana.
+    """
+    target = after.replace(hour=int(CFG.RETRAIN_HOUR), minute=0, second=0, microsecond=0)
+    if not daily:
+        target += dt.timedelta(days=(int(CFG.RETRAIN_DAY) - after.weekday()) % 7)
+    if after >= target + _RETRAIN_WINDOW:
+        target += dt.timedelta(days=1 if daily else 7)
+    return target
+
+
+async def retrain_loop() -> None:
     retrain_frequency = str(getattr(CFG, "RETRAIN_FREQUENCY", "weekly") or "weekly").strip().lower()
     if retrain_frequency not in {"daily", "weekly"}:
         retrain_frequency = "weekly"
@@ -7086,76 +7634,134 @@ async def retrain_loop() -> None:
     else:
         log.info("Retrain-loop activo (%s %02d:00 UTC)", weekday, CFG.RETRAIN_HOUR)
 
+    daily = retrain_frequency == "daily"
+    not_before = utc_now()
     while True:
+        next_run = _next_retrain_at(not_before, daily=daily)
+        delay = (next_run - utc_now()).total_seconds()
+        if delay > 0:
+            # Un único sleep hasta la ventana (troceado para re-anclar si cambia el reloj)
+            await asyncio.sleep(min(delay, _RETRAIN_MAX_SLEEP_S))
+            continue
+
         now = utc_now()
-        in_retrain_day = True if retrain_frequency == "daily" else (now.weekday() == CFG.RETRAIN_DAY)
-        if (
-            in_retrain_day
-            and now.hour   == CFG.RETRAIN_HOUR
-            and now.minute < 15   # ← ampliamos ventana (antes: < 10)
-        ):
-            # Log explícito de entrada en ventana
-            try:
-                log.info("⏰ Ventana de retraining abierta (UTC=%s)", now.strftime("%Y-%m-%d %H:%M"))
-            except Exception:
-                pass
+        if now >= next_run + _RETRAIN_WINDOW:
+            # ventana perdida (suspensión / salto de reloj) → esperar a la siguiente
+            not_before = now
+            continue
+        # Log explícito de entrada en ventana
+        try:
+            log.info("⏰ Ventana de retraining abierta (UTC=%s)", now.strftime("%Y-%m-%d %H:%M"))
+        except Exception:
+            pass
 
-            try:
-                if _retrain_lock.locked():
-                    log.info("Retrain-loop omitido: retrain ya en curso")
-                else:
-                    await _run_retrain_once(source="retrain_loop")
-            except Exception as exc:
-                log.error("Retrain error: %s", exc)
+        try:
+            if _retrain_lock.locked():
+                log.info("Retrain-loop omitido: retrain ya en curso")
+            else:
+                await _run_retrain_once(source="retrain_loop")
+        except Exception as exc:
+            log.error("Retrain error: %s", exc)
 
-            # Evitar disparos repetidos dentro de la misma hora
-            await asyncio.sleep(3600)
-            continue
+        # Evitar disparos repetidos dentro de la misma ventana
+        not_before = next_run + _RETRAIN_WINDOW
 
-            try:
-                _runtime_retrain_state = "running"
-                if retrain_if_better():
-                    # 1) Recargar modelo recién guardado
-                    reload_model()
-
-                    # 2) Releer y aplicar override de umbral recomendado en caliente
-                    _thr_override2 = _load_ai_threshold_override()
-                    if _thr_override2 is not None:
-                        global AI_THRESHOLD  # aplicar sobre el gate de IA en ejecución
-                        old = AI_THRESHOLD
-                        if abs(float(_thr_override2) - float(old)) >= float(MIN_THRESHOLD_CHANGE):
-                            AI_THRESHOLD = float(_thr_override2)
-                            log.info(
-                                "🎯 AI_THRESHOLD override aplicado: %.3f (antes=%.3f, Δ=%.3f≥%.3f)",
-                                AI_THRESHOLD, old, AI_THRESHOLD - old, MIN_THRESHOLD_CHANGE
-                            )
-                        else:
-                            log.info(
-                                "🎯 AI_THRESHOLD override ignorado por suavizado: rec=%.3f, actual=%.3f, Δ=%.3f<%.3f",
-                                float(_thr_override2), float(old),
-                                float(_thr_override2) - float(old), float(MIN_THRESHOLD_CHANGE)
-                            )
-
-                    log.info("🐢 Retrain completo; modelo recargado en memoria")
-                _runtime_retrain_state = "idle"
-            except Exception as exc:
-                _runtime_retrain_state = "failed"
-                _note_runtime_error("retrain_loop", exc)
-                log.error("Retrain error: %s", exc)
 
-            # Evitar disparos repetidos dentro de la misma hora
-            await asyncio.sleep(3600)
-        else:
-            await asyncio.sleep(300)
+# ╭─────────────────────── Warm-up ───────────────────────────────────────────╮
+async def _warmup_hot_paths() -> None:
+    """
+    Paga al arrancar el coste de primera llamada (unpickle de modelos,
+    handshakes HTTP/TLS) para que el primer candidato real no lo sufra.
+    """
+    t0 = time.monotonic()
+
+    def _warm_models() -> None:
+        vec = build_feature_vector({"address": "warmup", "discovered_via": "dex"})
+        should_buy(vec)
+        if bool(getattr(CFG, "ML_RISK_MODEL_ENABLED", True)):
+            predict_risk(vec)
+        if bool(getattr(CFG, "ML_EV_MODEL_ENABLED", True)):
+            predict_ev(vec)
+
+    jobs = [
+        asyncio.to_thread(_warm_models),
+        # TCP+TLS por host del pool compartido (dex/socials/rugcheck/helius/jup-router)
+        http_pool.warmup([
+            str(getattr(CFG, "DEXSCREENER_API", "") or ""),
+            str(getattr(CFG, "RUGCHECK_API_BASE", "") or ""),
+            str(getattr(CFG, "HELIUS_RPC_URL", "") or ""),
+            str(getattr(jupiter, "JUP_QUOTE_URL", "") or ""),
+        ]),
+    ]
+    if USE_JUPITER_PRICE:
+        jobs.append(jupiter_price.get_many_usd_prices([_SOL_MINT]))
+    results = await asyncio.gather(*jobs, return_exceptions=True)
+    for res in results:
+        if isinstance(res, BaseException):
+            log.debug("warmup → %s", res)
+    log.info("Warmup listo en %.2fs", time.monotonic() - t0)
 
 
 # ╭─────────────────────── Main loop ─────────────────────────────────────────╮
+async def _discovery_step() -> None:
+    """Paso 1 del main_loop: descubrimiento DexScreener → cola."""
+    global _last_discovery_ok_at
+    try:
+        for addr in await fetch_candidate_pairs():
+            _queue_add_if_new(addr)
+        _last_discovery_ok_at = utc_now()
+    except Exception as exc:
+        _note_runtime_error("fetch_candidate_pairs", exc)
+        log.error("fetch_candidate_pairs → %s", exc)
+
+
+async def _pumpfun_fetch_step() -> list[dict]:
+    """Paso 2 del main_loop (solo I/O): últimos tokens del stream Pump Fun."""
+    if _runtime_discovery_paused:
+        return []
+    try:
+        return list(await pumpfun.get_latest_pumpfun())
+    except Exception as exc:
+        _note_runtime_error("pumpfun_stream", exc)
+        log.error("PumpFun stream → %s", exc)
+        return []
+
+
+async def _monitor_step() -> None:
+    """
+    Paso 4 del main_loop: posiciones abiertas. Sesión propia por ciclo: no
+    comparte transacción ni conexión con descubrimiento ni evaluaciones.
+    """
+    global _last_monitor_ok_at
+    try:
+        async with SessionLocal() as mon_ses:
+            await _check_positions(mon_ses)
+        _last_monitor_ok_at = utc_now()
+    except Exception as exc:
+        _note_runtime_error("check_positions", exc)
+        log.error("Check positions → %s", exc)
+
+
+def _adaptive_sleep_s(base_s: float, *, idle_ticks: int, near_exit: bool) -> float:
+    """
+    Sleep del main_loop según la carga del tick anterior:
+    • posiciones en zona crítica → mitad de SLEEP_SECONDS (mín. 1 s);
+    • ticks ociosos consecutivos → backoff exponencial hasta IDLE_SLEEP_MAX_S;
+    • en otro caso, SLEEP_SECONDS.
+    """
+    if near_exit:
+        return max(base_s / 2.0, 1.0)
+    if idle_ticks > 0:
+        return min(base_s * (2 ** min(idle_ticks, 16)), IDLE_SLEEP_MAX_S)
+    return base_s
+
+
 async def main_loop() -> None:
     global _runtime_started_at, _runtime_process_state
-    global _last_discovery_ok_at, _last_monitor_ok_at, _runtime_reports_refresh_state
+    global _runtime_reports_refresh_state
     global _wallet_sol_balance, _last_stats_print, _last_csv_export, _last_wallet_checked_at
+    global _last_features_flush, _csv_export_task
     global _BOOT_AUDIT_EMITTED
-    ses             = SessionLocal()
     last_discovery  = 0.0
     if _runtime_started_at is None:
         _runtime_started_at = utc_now()
@@ -7165,7 +7771,7 @@ async def main_loop() -> None:
     now_local = dt.datetime.now()
     windows = list(_TRADING_HOURS) + (list(_TRADING_HOURS_EXTRA) if _USE_EXTRA_HOURS else [])
     has_windows = bool(windows)
-    is_blocked  = _in_ranges(now_local, _BLOCK_HOURS) if _BLOCK_HOURS else False
+    is_blocked  = bool(_HOUR_BLOCKED[now_local.hour])
     is_allowed  = _in_trading_window(now_local)
 
     if not has_windows and not _BLOCK_HOURS:
@@ -7437,79 +8043,83 @@ async def main_loop() -> None:
                 log.info("Backfill paper_portfolio entry_notional_usd aplicado a %d posiciones", repaired)
         except Exception as exc:
             log.debug("paper_portfolio backfill → %s", exc)
-    await _repair_position_entry_notionals(ses)
-    await _bootstrap_strategy_runtime(ses)
+    async with SessionLocal() as boot_ses:
+        await _repair_position_entry_notionals(boot_ses)
+        _sync_open_positions(await _load_open_position_addresses(boot_ses), frozenset(_OPEN_POSITIONS))
+        await _bootstrap_strategy_runtime(boot_ses)
     _log_strategy_health_snapshot()
+    try:
+        await _warmup_hot_paths()
+    except Exception as exc:
+        log.debug("warmup → %s", exc)
     try:
         await _refresh_reports_once(source="research_scorecard_init", force=True, include=("research",))
     except Exception as exc:
         log.debug("research scorecard init → %s", exc)
     _runtime_process_state = "running"
+    idle_ticks = 0
 
     while True:
         now_mono = time.monotonic()
+        tick_busy = False
         await _refresh_balance(now_mono)
 
         # 1) Descubrimiento DexScreener
+        #    + 2) fetch del stream Pump Fun + 4) posiciones abiertas, en
+        #    paralelo: solo I/O independiente (el monitor usa su propia sesión);
+        #    las evaluaciones arrancan después del gather.
+        steps = [_pumpfun_fetch_step(), _monitor_step()]
         if now_mono - last_discovery >= DISCOVERY_INTERVAL:
-            if _runtime_discovery_paused:
-                last_discovery = now_mono
-            else:
-                try:
-                    for addr in await fetch_candidate_pairs():
-                        _queue_add_if_new(addr)
-                    _last_discovery_ok_at = utc_now()
-                except Exception as exc:
-                    _note_runtime_error("fetch_candidate_pairs", exc)
-                    log.error("fetch_candidate_pairs → %s", exc)
-                last_discovery = now_mono
-
-        # 2) Stream Pump Fun
-        if not _runtime_discovery_paused:
-            try:
-                for tok in await pumpfun.get_latest_pumpfun():
-                    if bool(getattr(CFG, "HOT_QUEUE_ENABLED", True)):
-                        GLOBAL_HOT_QUEUE.add(tok, source=str(tok.get("source") or tok.get("discovered_via") or "pumpfun"))
-                    else:
-                        await _evaluate_and_buy_guarded(tok, ses, source="pumpfun")
-            except Exception as exc:
-                _note_runtime_error("pumpfun_stream", exc)
-                log.error("PumpFun stream → %s", exc)
+            if not _runtime_discovery_paused:
+                steps.append(_discovery_step())
+            last_discovery = now_mono
+        stream_toks, *_ = await asyncio.gather(*steps)
+
+        # 2) Stream Pump Fun → hot queue (o evaluación directa)
+        tick_busy |= bool(stream_toks)
+        try:
+            stream_batch: list[dict] = []
+            for tok in stream_toks:
+                if bool(getattr(CFG, "HOT_QUEUE_ENABLED", True)):
+                    GLOBAL_HOT_QUEUE.add(tok, source=str(tok.get("source") or tok.get("discovered_via") or "pumpfun"))
+                else:
+                    stream_batch.append(tok)
+            await _evaluate_many(stream_batch, source="pumpfun")
+        except Exception as exc:
+            _note_runtime_error("pumpfun_stream", exc)
+            log.error("PumpFun stream → %s", exc)
 
         # 3) Validación cola
         if bool(getattr(CFG, "HOT_QUEUE_ENABLED", True)):
             try:
-                for tok in GLOBAL_HOT_QUEUE.pop_batch(int(getattr(CFG, "HOT_QUEUE_BATCH_SIZE", 12) or 12)):
-                    await _evaluate_and_buy_guarded(tok, ses, source="hot_queue")
+                hot_batch = GLOBAL_HOT_QUEUE.pop_batch(int(getattr(CFG, "HOT_QUEUE_BATCH_SIZE", 12) or 12))
+                tick_busy |= bool(hot_batch)
+                await _evaluate_many(hot_batch, source="hot_queue")
             except Exception as exc:
                 _note_runtime_error("hot_queue", exc)
                 log.error("Hot queue -> %s", exc)
 
-        for addr in obtener_pares()[:VALIDATION_BATCH_SIZE]:
-            try:
-                meta    = lista_pares.meta(addr) or {}
-                queue_age_s = max(0.0, time.time() - float(meta.get("first_seen", time.time()) or time.time()))
-                attempts = int(meta.get("attempts", 0) or 0)
-                use_gt  = attempts >= _GECKO_MIN_QUEUE_ATTEMPTS and queue_age_s >= _GECKO_MIN_QUEUE_AGE_S
-                tok     = await price_service.get_price(addr, use_gt=use_gt, allow_partial=True)
-                if tok is None and not use_gt and attempts >= _GECKO_MIN_QUEUE_ATTEMPTS and queue_age_s >= _GECKO_MIN_QUEUE_AGE_S:
-                    # Un primer fallback con Gecko reduce requeues "dex_nil"
-                    # cuando Jupiter/Birdeye/DexScreener no completan liquidez.
-                    tok = await price_service.get_price(addr, use_gt=True, allow_partial=True)
-                if tok:
-                    await _evaluate_and_buy_guarded(tok, ses, source="queue")
-                else:
-                    _requeue_with_stats(addr, reason="dex_nil")
-            except Exception as exc:
-                log.error("get_price %s → %s", addr[:6], exc)
+        queued = obtener_pares()[:VALIDATION_BATCH_SIZE]
+        tick_busy |= bool(queued)
+        if queued:
+            # Un único batch Jupiter por tick (lote + posiciones abiertas), en
+            # paralelo con la validación: calienta la caché de jupiter_price,
+            # así el precio del paso 12 (get_price price_only) y el batch del
+            # monitor del tick siguiente salen de caché en vez de pedir su RTT.
+            tick_mints = queued + [a for a in _OPEN_POSITIONS if a not in queued]
+            resolved, _ = await asyncio.gather(
+                asyncio.gather(*(_validate_queued(addr) for addr in queued)),
+                _prefetch_batch_prices(tick_mints),
+            )
+            await _evaluate_many([tok for tok in resolved if tok], source="queue")
 
-        # 4) Posiciones abiertas
-            try:
-                await _check_positions(ses)
-                _last_monitor_ok_at = utc_now()
-            except Exception as exc:
-                _note_runtime_error("check_positions", exc)
-                log.error("Check positions → %s", exc)
+        # 4.1) Pares procesados del tick → un único append a pares_procesados.txt
+        lista_pares.flush_processed()
+
+        # 4.2) Upsert en bloque de los Token evaluados en este tick
+        if _pending_token_rows:
+            async with SessionLocal() as flush_ses:
+                await _flush_token_rows(flush_ses)
 
         # 4.5) Shadows (modo real o estrategia shadow en paper/live)
         if _shadow_positions or (not DRY_RUN and REAL_SHADOW_SIM):
@@ -7544,32 +8154,69 @@ async def main_loop() -> None:
                 log.debug("research scorecard refresh → %s", exc)
             _last_stats_print = now_mono
 
-        # 6) Export CSV cada hora
+        # 6) Flush del buffer de features (fuera del event-loop) + export CSV cada hora
+        if now_mono - _last_features_flush >= _FEATURES_FLUSH_INTERVAL_S:
+            try:
+                await asyncio.to_thread(store_flush)
+            except Exception as exc:
+                log.debug("features flush → %s", exc)
+            _last_features_flush = now_mono
         if now_mono - _last_csv_export >= 3600:
-            store_export_csv()
+            # en background: leer+volcar el Parquet del mes puede tardar segundos;
+            # si el export anterior sigue vivo no se encola otro
+            if _csv_export_task is None or _csv_export_task.done():
+                _csv_export_task = asyncio.create_task(asyncio.to_thread(store_export_csv))
             _last_csv_export = now_mono
 
         await _maybe_regenerate_core_reports(source="loop")
-        await asyncio.sleep(runner_turbo_monitor.target_sleep_seconds(SLEEP_SECONDS, dry_run=DRY_RUN))
+        tick_busy |= bool(_OPEN_POSITIONS or _shadow_positions)
+        idle_ticks = 0 if tick_busy else idle_ticks + 1
+        sleep_s = _adaptive_sleep_s(float(SLEEP_SECONDS), idle_ticks=idle_ticks, near_exit=_MON_NEAR_EXIT)
+        await asyncio.sleep(runner_turbo_monitor.target_sleep_seconds(sleep_s, dry_run=DRY_RUN))
 
 
 # ╭─────────────────────── Entrypoint ───────────────────────────────────────╮
+async def _supervise(coros: Sequence[Any]) -> None:
+    """
+    Concurrencia estructurada (equivalente a asyncio.TaskGroup, válido en 3.10):
+    si un loop muere, se cancelan los demás y se propaga su excepción en vez de
+    dejar al resto girando con el runner ya roto.
+    """
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    try:
+        done, _pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for t in done:
+        if not t.cancelled() and t.exception() is not None:
+            raise t.exception()
+
+
 async def _runner() -> None:
     global _runtime_process_state
+    if _LOOP_PROFILE:
+        loop = asyncio.get_running_loop()
+        loop.set_debug(True)
+        loop.slow_callback_duration = LOOP_SLOW_CALLBACK_S
+        logging.getLogger("asyncio").setLevel(logging.WARNING)
+        log.warning("🩺 Loop profiler activo: bloqueos > %.3fs se registran (logger asyncio)", LOOP_SLOW_CALLBACK_S)
     await async_init_db()
     _runtime_process_state = "starting"
     try:
-        tasks = [
+        coros = [
             main_loop(),
             _periodic_labeler(),
             control_command_loop(),
             runtime_state_loop(),
         ]
         if bool(getattr(CFG, "ML_RETRAIN_IN_MAIN_LOOP", False)):
-            tasks.append(retrain_loop())
+            coros.append(retrain_loop())
         else:
             log.info("Retrain-loop omitido: ML_RETRAIN_IN_MAIN_LOOP=false")
-        await asyncio.gather(*tasks)
+        await _supervise(coros)
     except Exception as exc:
         _runtime_process_state = "stopped"
         _note_runtime_error("runner", exc)
@@ -7578,6 +8225,8 @@ async def _runner() -> None:
         except Exception as publish_exc:
             log.error("runtime state final publish → %s", publish_exc)
         raise
+    finally:
+        await http_pool.close_session()
 
 if __name__ == "__main__":
     try:
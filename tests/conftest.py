@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import ast
+import functools
+from pathlib import Path
+from typing import Any, Iterable
+
+_RUN_BOT = Path(__file__).resolve().parents[1] / "run_bot.py"
+
+
+@functools.lru_cache(maxsize=1)
+def _run_bot_tree() -> ast.Module:
+    return ast.parse(_RUN_BOT.read_text(encoding="utf-8"), filename="run_bot.py")
+
+
+def _node_names(node: ast.stmt) -> list[str]:
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return [node.name]
+    if isinstance(node, ast.Assign):
+        return [t.id for t in node.targets if isinstance(t, ast.Name)]
+    if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+        return [node.target.id]
+    return []
+
+
+def _wanted(name: str, names: set[str]) -> bool:
+    return name in names or any(n.endswith("*") and name.startswith(n[:-1]) for n in names)
+
+
+def load_run_bot_defs(names: Iterable[str], **ns: Any) -> dict[str, Any]:
+    """
+    Ejecuta solo las definiciones top-level de run_bot.py pedidas (funciones y
+    asignaciones; "_SIG_*" acepta prefijo), en orden de fichero, sobre un
+    namespace con las dependencias que inyecta el test. Evita importar
+    run_bot entero (config, red, BD…).
+    """
+    wanted = set(names)
+    body = [
+        node
+        for node in _run_bot_tree().body
+        if any(_wanted(name, wanted) for name in _node_names(node))
+    ]
+    namespace: dict[str, Any] = dict(ns)
+    exec(compile(ast.Module(body=body, type_ignores=[]), "run_bot.py", "exec"), namespace)
+    return namespace
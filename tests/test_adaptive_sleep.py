@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from conftest import load_run_bot_defs
+
+
+def _load_adaptive_sleep(idle_max_s: float = 30.0):
+    return load_run_bot_defs({"_adaptive_sleep_s"}, IDLE_SLEEP_MAX_S=idle_max_s)["_adaptive_sleep_s"]
+
+
+def test_busy_tick_keeps_base_sleep() -> None:
+    sleep_s = _load_adaptive_sleep()
+    assert sleep_s(4.0, idle_ticks=0, near_exit=False) == 4.0
+
+
+def test_idle_ticks_back_off_up_to_cap() -> None:
+    sleep_s = _load_adaptive_sleep(idle_max_s=30.0)
+    assert sleep_s(4.0, idle_ticks=1, near_exit=False) == 8.0
+    assert sleep_s(4.0, idle_ticks=2, near_exit=False) == 16.0
+    assert sleep_s(4.0, idle_ticks=3, near_exit=False) == 30.0
+    assert sleep_s(4.0, idle_ticks=10_000, near_exit=False) == 30.0
+
+
+def test_near_exit_positions_halve_sleep_with_floor() -> None:
+    sleep_s = _load_adaptive_sleep()
+    assert sleep_s(4.0, idle_ticks=0, near_exit=True) == 2.0
+    assert sleep_s(1.5, idle_ticks=0, near_exit=True) == 1.0
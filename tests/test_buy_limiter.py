@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import numpy as np
+
+from utils._njit import njit as _njit
+
+from conftest import load_run_bot_defs
+
+
+def njit(*args, **kwargs):
+    # kernels exec'd fuera de su módulo: sin caché en disco de numba
+    kwargs["cache"] = False
+    return _njit(*args, **kwargs)
+
+
+def _load_kernel():
+    # firmas numba (_SIG_*) + kernel
+    return load_run_bot_defs({"_SIG_*", "_bucket_allow"}, njit=njit)["_bucket_allow"]
+
+
+S = 1_000_000_000  # los kernels trabajan en ns enteros (time.monotonic_ns)
+
+
+def test_bucket_caps_hits_and_expires_them_after_window() -> None:
+    allow = _load_kernel()
+    ts = np.zeros(2, dtype=np.int64)
+    head, count = 0, 0
+
+    head, count, ok = allow(ts, head, count, 10 * S, 100 * S, 1)
+    assert ok and count == 1
+    head, count, ok = allow(ts, head, count, 10 * S, 101 * S, 1)
+    assert ok and count == 2
+    head, count, ok = allow(ts, head, count, 10 * S, 105 * S, 1)
+    assert not ok and count == 2
+
+    # el primer hit (t=100) caduca; el buffer da la vuelta sin perder el segundo
+    head, count, ok = allow(ts, head, count, 10 * S, 110 * S + 1, 1)
+    assert ok and count == 2
+    head, count, _ = allow(ts, head, count, 10 * S, 111 * S + 1, 0)
+    assert count == 1
+    assert ts[head] == 110 * S + 1
+
+
+def test_bucket_rejects_bursts_larger_than_capacity() -> None:
+    allow = _load_kernel()
+    ts = np.zeros(3, dtype=np.int64)
+    _, count, ok = allow(ts, 0, 0, 60 * S, 1 * S, 4)
+    assert not ok and count == 0
+
+
+def _load_pf_core():
+    names = {"_SIG_*", "_bucket_allow", "_pf_can_try_now_core"}
+    return load_run_bot_defs(names, njit=njit, _PF_PROBE=8)["_pf_can_try_now_core"]
+
+
+def test_pf_quota_and_per_token_cooldown() -> None:
+    core = _load_pf_core()
+    keys = np.zeros(16, dtype=np.int64)
+    last = np.zeros(16, dtype=np.int64)
+    ts = np.zeros(2, dtype=np.int64)
+    head = count = 0
+
+    def attempt(now_s: float, key: int) -> bool:
+        nonlocal head, count
+        head, count, ok = core(keys, last, ts, head, count, 10 * S, 25 * S, int(now_s * S), key)
+        return bool(ok)
+
+    assert attempt(100.0, 1)
+    assert not attempt(101.0, 1)      # cooldown del token
+    assert attempt(102.0, 17)         # colisiona con 1 en la tabla, hueco siguiente
+    assert not attempt(103.0, 5)      # cupo global (2 por ventana) agotado
+    assert attempt(112.5, 5)          # el intento de t=100 sale de la ventana
+    assert not attempt(120.0, 17)     # 17 sigue en cooldown pese a la colisión
+    assert attempt(126.0, 1)          # cooldown de 1 vencido
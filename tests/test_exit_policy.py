@@ -88,6 +88,23 @@ def test_pumpswap_profit_no_pump_exits_before_generic_time_stop() -> None:
     assert reason == "NO_PUMP_EXIT"
 
 
+def test_precomputed_age_s_replaces_opened_at() -> None:
+    now = dt.datetime.now(dt.timezone.utc)
+    subject = {
+        "entry_regime": "pump_early",
+        "entry_lane": "pump_early_pumpswap_profit",
+        "gate_profile": "pumpswap_profit_broad",
+        "opened_at": now,
+        "buy_price_usd": 1.0,
+        "highest_pnl_pct": 1.5,
+        "partial_taken": False,
+    }
+
+    assert exit_policy.should_exit(subject, price_now=1.0, now=now, pnl_pct=0.0) is None
+    reason = exit_policy.should_exit(subject, price_now=1.0, now=now, pnl_pct=0.0, age_s=190.0)
+    assert reason == "NO_PUMP_EXIT"
+
+
 def test_green_sniper_uses_runner_profile_and_later_partial() -> None:
     subject = {
         "entry_regime": "pump_early",
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+
+import features.store as store
+
+
+def test_failed_write_puts_rows_back_for_retry(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(store, "_PENDING", [])
+    monkeypatch.setattr(store, "_file_for_now", lambda clock=None: tmp_path / "features_test.parquet")
+    calls: list[int] = []
+
+    def _write(table, path):
+        calls.append(table.num_rows)
+        if len(calls) == 1:
+            raise OSError("disk full")
+
+    monkeypatch.setattr(store, "_write", _write)
+    store._PENDING.extend([{"ts": None, "label": 0}, {"ts": None, "label": 1}])
+
+    assert store.flush() == 0
+    assert [r["label"] for r in store._PENDING] == [0, 1]
+    assert store.flush() == 2
+    assert store._PENDING == []
+    assert calls == [2, 2]
+
+
+def test_append_hands_flush_to_a_thread(monkeypatch) -> None:
+    monkeypatch.setattr(store, "_PENDING", [])
+    monkeypatch.setattr(store, "_FLUSH_ROWS", 1)
+    monkeypatch.setattr(store, "_FLUSH_THREAD", None)
+    release = threading.Event()
+    flushed_in: list[str] = []
+
+    def _flush():
+        flushed_in.append(threading.current_thread().name)
+        release.wait(5)
+        return 0
+
+    monkeypatch.setattr(store, "flush", _flush)
+    store.append({}, 0)  # no se bloquea aunque el flush siga en curso
+    store.append({}, 1)  # ya hay un hilo vivo → no se lanza otro
+    release.set()
+    store._FLUSH_THREAD.join(5)
+
+    assert flushed_in == ["features-flush"]
+    assert len(store._PENDING) == 2
+
+
+def test_update_pnl_rewrites_parquet_atomically_under_the_flush_lock(monkeypatch, tmp_path) -> None:
+    path = tmp_path / "features_test.parquet"
+    monkeypatch.setattr(store, "_PENDING", [])
+    monkeypatch.setattr(store, "_file_for_now", lambda clock=None: path)
+    store.append({"address": "mintA"}, 1)
+    store.append({"address": "mintB"}, 0)
+    assert store.flush() == 2
+
+    real_flush = store.flush
+    held: list[bool] = []
+
+    def _flush():
+        # otro hilo no puede tomar el lock mientras update_pnl lo retiene
+        probe = threading.Thread(target=lambda: held.append(not store._FLUSH_LOCK.acquire(timeout=0.01)))
+        probe.start()
+        probe.join()
+        return real_flush()
+
+    monkeypatch.setattr(store, "flush", _flush)
+    store.update_pnl("mintA", 42.0)
+
+    table = store.pq.read_table(path)
+    assert held == [True]
+    assert table.column("target_total_pnl_pct").to_pylist() == [42.0, None]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["features_test.parquet"]
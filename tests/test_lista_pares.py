@@ -28,3 +28,20 @@ def test_temporary_strategy_requeues_preserve_retry_budget(monkeypatch) -> None:
 
     assert lista_pares.requeue(addr, reason="no_liq", backoff=1) is True
     assert lista_pares.retries_left(addr) == 1
+
+
+def test_processed_pairs_are_persisted_in_one_flush(monkeypatch, tmp_path) -> None:
+    _reset_queue_state()
+    lista_pares._pending_persist.clear()
+    cache_file = tmp_path / "pares_procesados.txt"
+    monkeypatch.setattr(lista_pares, "CACHE_FILE", cache_file)
+    monkeypatch.setattr(lista_pares, "log_queue_add", lambda *args, **kwargs: None)
+
+    for addr in ("a1", "a2", "a1"):
+        lista_pares.agregar_si_nuevo(addr)
+        lista_pares.eliminar_par(addr)
+
+    assert not cache_file.exists()
+    assert lista_pares.flush_processed() == 2
+    assert cache_file.read_text().splitlines() == ["a1", "a2"]
+    assert lista_pares.flush_processed() == 0
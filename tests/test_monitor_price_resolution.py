@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import Optional, Tuple
+
+from conftest import load_run_bot_defs
+
+
+def _load_resolver(get_price, get_price_usd):
+    wanted = {
+        "_probe_dex_full",
+        "_probe_jup_single",
+        "_probe_jup_critical",
+        "_resolve_position_price",
+    }
+    namespace = load_run_bot_defs(
+        wanted,
+        asyncio=asyncio,
+        Optional=Optional,
+        Tuple=Tuple,
+        price_service=SimpleNamespace(get_price=get_price, get_price_usd=get_price_usd),
+    )
+    return namespace["_resolve_position_price"]
+
+
+def test_jupiter_first_hit_never_queries_dex() -> None:
+    dex_calls = []
+
+    async def get_price(mint, use_gt=False, price_only=False):
+        dex_calls.append(mint)
+        return {"price_usd": 9.0, "liquidity_usd": 100.0}
+
+    async def get_price_usd(mint, critical=False):
+        return 1.5
+
+    resolve = _load_resolver(get_price, get_price_usd)
+
+    assert asyncio.run(
+        resolve("mint", None, prefer_dex=False, take_crit_slot=lambda: False, need_liq=False)
+    ) == (1.5, "jup_single", None)
+    assert dex_calls == []
+
+
+def test_jupiter_miss_falls_back_to_dex() -> None:
+    async def get_price(mint, use_gt=False, price_only=False):
+        return {"price_usd": 9.0}
+
+    async def get_price_usd(mint, critical=False):
+        return None
+
+    resolve = _load_resolver(get_price, get_price_usd)
+
+    assert asyncio.run(
+        resolve("mint", None, prefer_dex=False, take_crit_slot=lambda: False, need_liq=False)
+    ) == (9.0, "dex_full", None)
+
+
+def test_dex_first_falls_back_to_batch_then_critical() -> None:
+    calls = []
+
+    async def get_price(mint, use_gt=False, price_only=False):
+        calls.append(("dex", price_only))
+        return None
+
+    async def get_price_usd(mint, critical=False):
+        calls.append(("jup", critical))
+        return 2.0 if critical else None
+
+    resolve = _load_resolver(get_price, get_price_usd)
+
+    assert asyncio.run(
+        resolve("mint", 3.0, prefer_dex=True, take_crit_slot=lambda: True, need_liq=False)
+    ) == (3.0, "jup_batch", None)
+    assert ("jup", False) not in calls
+
+    calls.clear()
+    assert asyncio.run(
+        resolve("mint", None, prefer_dex=True, take_crit_slot=lambda: True, need_liq=False)
+    ) == (2.0, "jup_critical", None)
+    assert ("jup", False) in calls and ("jup", True) in calls
+
+
+def test_liquidity_probe_runs_only_when_dex_did_not_report_liquidity() -> None:
+    async def get_price(mint, use_gt=False, price_only=False):
+        if price_only:
+            return None
+        return {"liquidity_usd": 42.0}
+
+    async def get_price_usd(mint, critical=False):
+        return 1.0
+
+    resolve = _load_resolver(get_price, get_price_usd)
+
+    assert asyncio.run(
+        resolve("mint", 1.0, prefer_dex=False, take_crit_slot=lambda: False, need_liq=True)
+    ) == (1.0, "jup_batch", 42.0)
+
+
+def test_dex_probe_serves_price_and_liquidity_in_one_call() -> None:
+    calls = []
+
+    async def get_price(mint, use_gt=False, price_only=False):
+        calls.append(price_only)
+        return {"price_usd": 2.5, "liquidity_usd": 900.0}
+
+    async def get_price_usd(mint, critical=False):
+        return None
+
+    resolve = _load_resolver(get_price, get_price_usd)
+
+    assert asyncio.run(
+        resolve("mint", None, prefer_dex=True, take_crit_slot=lambda: False, need_liq=True)
+    ) == (2.5, "dex_full", 900.0)
+    assert calls == [False]
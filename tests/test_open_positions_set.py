@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from conftest import load_run_bot_defs
+
+
+def _load_sync():
+    namespace = load_run_bot_defs({"_sync_open_positions", "_OPEN_POSITIONS"})
+    return namespace["_sync_open_positions"], namespace["_OPEN_POSITIONS"]
+
+
+def test_sync_drops_positions_closed_outside_the_bot() -> None:
+    sync, open_positions = _load_sync()
+    open_positions.update({"a", "b"})
+
+    sync({"a"}, frozenset(open_positions))
+
+    assert open_positions == {"a"}
+
+
+def test_sync_keeps_buy_committed_while_query_was_in_flight() -> None:
+    sync, open_positions = _load_sync()
+    open_positions.add("a")
+    before = frozenset(open_positions)
+    open_positions.add("fresh")  # BUY confirmado tras lanzar la query
+
+    sync({"a"}, before)
+
+    assert open_positions == {"a", "fresh"}
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import logging
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Boolean, Float, String, select
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.inspection import inspect
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from conftest import load_run_bot_defs
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class _Pos(_Base):
+    __tablename__ = "positions"
+
+    address: Mapped[str] = mapped_column(String, primary_key=True)
+    qty: Mapped[float] = mapped_column(Float, default=1.0)
+    closed: Mapped[bool] = mapped_column(Boolean, default=False)
+    exit_reason: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    close_price_usd: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    closed_at: Mapped[Optional[dt.datetime]] = mapped_column(nullable=True)
+
+
+def _load_execute_pending_sells(*, failing: set, open_positions: set, marked: list):
+    async def _sell(address, qty, **_kw):
+        await asyncio.sleep(0)
+        if address in failing:
+            return {"ok": False, "err": "boom"}
+        return {"ok": True, "price_used_usd": 2.0, "signature": f"sig-{address}"}
+
+    noop = lambda *a, **k: None  # noqa: E731
+    namespace: Dict[str, Any] = {
+        "asyncio": asyncio,
+        "dt": dt,
+        "Any": Any,
+        "Dict": Dict,
+        "List": List,
+        "Optional": Optional,
+        "SessionLocal": AsyncSession,
+        "Position": _Pos,
+        "inspect": inspect,
+        "SQLAlchemyError": SQLAlchemyError,
+        "log": logging.getLogger("test_pending_sells"),
+        "SELL_CONCURRENCY": 4,
+        "DRY_RUN": True,
+        "_POS_HAS_PRICE_SOURCE_AT_CLOSE": False,
+        "_POS_HAS_EXIT_TX_SIG": False,
+        "_OPEN_POSITIONS": open_positions,
+        "seller": SimpleNamespace(sell=_sell),
+        "strategy_runtime": SimpleNamespace(record_execution=noop, record_trade_close=noop),
+        "research_runtime": SimpleNamespace(record_live_trade_close=noop),
+        "runner_turbo_monitor": SimpleNamespace(mark_closed=lambda addr, now: marked.append(addr)),
+        "live_canary": SimpleNamespace(record_green_live_close=noop),
+        "log_execution_event": noop,
+        "_record_sell_stat": noop,
+        "_seal_closed_trade_metrics": noop,
+        "_persist_dataset_at_close": lambda pos, price: pos.closed,
+        "_position_health_metadata": lambda pos: {},
+        "_position_research_metrics": lambda pos: {},
+        "_position_execution_state": lambda pos: None,
+        "refresh_post_partial_experiment_snapshot": noop,
+    }
+    names = {"_reload_if_expired", "_execute_pending_sells"}
+    return load_run_bot_defs(names, **namespace)["_execute_pending_sells"]
+
+
+async def _run(
+    addresses: List[str],
+    *,
+    failing: set,
+    fail_first_commit: bool = False,
+    rollback_before: bool = False,
+):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(_Base.metadata.create_all)
+    maker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    open_positions = set(addresses)
+    marked: List[str] = []
+    execute = _load_execute_pending_sells(failing=failing, open_positions=open_positions, marked=marked)
+
+    async with maker() as ses:
+        ses.add_all([_Pos(address=a) for a in addresses])
+        await ses.commit()
+        positions = (await ses.execute(select(_Pos).order_by(_Pos.address))).scalars().all()
+        if fail_first_commit:
+            real_commit = ses.commit
+            calls = {"n": 0}
+
+            async def _commit():
+                calls["n"] += 1
+                if calls["n"] == 1:
+                    raise OperationalError("COMMIT", {}, Exception("database is locked"))
+                await real_commit()
+
+            ses.commit = _commit
+        pending = [
+            {
+                "pos": pos,
+                "address": pos.address,
+                "qty": pos.qty,
+                "regime": "r",
+                "reason": "TP",
+                "mint_key": pos.address,
+                "price_hint": 1.0,
+                "source_hint": "jup",
+                "close_fallback": 1.0,
+            }
+            for pos in positions
+        ]
+        if rollback_before:
+            await ses.rollback()  # p.ej. un commit de métricas fallido en el monitor
+        done = await execute(ses, pending, now=dt.datetime(2026, 1, 1))
+
+    async with maker() as ses:
+        closed = {
+            p.address: p.closed for p in (await ses.execute(select(_Pos))).scalars().all()
+        }
+    await engine.dispose()
+    assert sorted(marked) == sorted(a for a, is_closed in closed.items() if is_closed)
+    return done, closed, open_positions
+
+
+def test_failed_sell_does_not_break_bookkeeping_of_others() -> None:
+    done, closed, open_positions = asyncio.run(_run(["a", "b", "c", "d"], failing={"a"}))
+
+    assert done == 3
+    assert closed == {"a": False, "b": True, "c": True, "d": True}
+    assert open_positions == {"a"}
+
+
+def test_failed_commit_reloads_remaining_positions_and_is_not_counted() -> None:
+    done, closed, open_positions = asyncio.run(
+        _run(["a", "b", "c"], failing=set(), fail_first_commit=True)
+    )
+
+    assert done == 2
+    assert closed == {"a": False, "b": True, "c": True}
+    assert open_positions == {"a"}
+
+
+def test_positions_expired_by_a_monitor_rollback_are_still_sold_and_closed() -> None:
+    done, closed, open_positions = asyncio.run(
+        _run(["a", "b", "c"], failing={"b"}, rollback_before=True)
+    )
+
+    assert done == 2
+    assert closed == {"a": True, "b": False, "c": True}
+    assert open_positions == {"b"}
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import datetime as dt
+from types import SimpleNamespace
+from typing import Dict
+
+from conftest import load_run_bot_defs
+
+
+def _load():
+    namespace = load_run_bot_defs(
+        {"_position_opened_epoch", "_OPENED_EPOCH_BY_ID"},
+        dt=dt,
+        Dict=Dict,
+        Position=object,
+        parse_iso_utc=dt.datetime.fromisoformat,
+    )
+    return namespace["_position_opened_epoch"], namespace["_OPENED_EPOCH_BY_ID"]
+
+
+def test_opened_epoch_survives_new_instances_of_the_same_position() -> None:
+    opened_epoch, cache = _load()
+    opened = dt.datetime(2026, 1, 1, 12, 0, 0)
+    expected = opened.replace(tzinfo=dt.timezone.utc).timestamp()
+
+    assert opened_epoch(SimpleNamespace(id=7, opened_at=opened)) == expected
+    assert cache == {7: expected}
+
+    # ciclo siguiente: instancia ORM nueva (sin opened_at legible) → sale del cache por id
+    assert opened_epoch(SimpleNamespace(id=7, opened_at=None)) == expected
+    assert opened_epoch(SimpleNamespace(id=8, opened_at=None)) is None
@@ -39,3 +39,40 @@ async def test_gecko_fallback_has_hard_timeout(monkeypatch):
     assert out is None
     assert elapsed < 1.0
     assert simple_cache.cache_get(f"price:gt_skip:{address}") is True
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_source_query(monkeypatch):
+    address = "So11111111111111111111111111111111111111112"
+    simple_cache._CACHE.clear()
+    calls = []
+
+    async def fake_sources(addr, *, use_gt, fields_needed):
+        calls.append(addr)
+        await asyncio.sleep(0.01)
+        return {"price_usd": 2.0}
+
+    monkeypatch.setattr(price_service, "_query_sources", fake_sources)
+
+    results = await asyncio.gather(
+        *(price_service.get_price(address, price_only=True) for _ in range(5))
+    )
+
+    assert calls == [address]
+    assert all(r and r["price_usd"] == 2.0 for r in results)
+    assert not price_service._INFLIGHT
+
+
+@pytest.mark.asyncio
+async def test_inflight_callback_keeps_newer_task():
+    key = ("k", False, False)
+    loop = asyncio.get_running_loop()
+    old, new = loop.create_future(), loop.create_future()
+    old.set_exception(RuntimeError("boom"))
+    price_service._INFLIGHT[key] = new
+    try:
+        price_service._inflight_done(key, old)  # la vieja no desaloja a la nueva
+        assert price_service._INFLIGHT[key] is new
+    finally:
+        price_service._INFLIGHT.pop(key, None)
+        new.cancel()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import datetime as dt
+from types import SimpleNamespace
+
+from conftest import load_run_bot_defs
+
+
+def _load_next_retrain_at(*, day: int, hour: int):
+    namespace = load_run_bot_defs(
+        {"_next_retrain_at", "_RETRAIN_WINDOW"},
+        dt=dt,
+        CFG=SimpleNamespace(RETRAIN_DAY=day, RETRAIN_HOUR=hour),
+    )
+    return namespace["_next_retrain_at"]
+
+
+def _utc(*args: int) -> dt.datetime:
+    return dt.datetime(*args, tzinfo=dt.timezone.utc)
+
+
+def test_weekly_retrain_targets_configured_weekday_and_hour() -> None:
+    next_at = _load_next_retrain_at(day=6, hour=3)  # domingo 03:00
+
+    # 2026-10-14 es miércoles
+    assert next_at(_utc(2026, 10, 14, 12, 0), daily=False) == _utc(2026, 10, 18, 3, 0)
+    # dentro de la ventana de 15 min → la ventana actual
+    assert next_at(_utc(2026, 10, 18, 3, 10), daily=False) == _utc(2026, 10, 18, 3, 0)
+    # ventana cerrada → semana siguiente
+    assert next_at(_utc(2026, 10, 18, 3, 15), daily=False) == _utc(2026, 10, 25, 3, 0)
+
+
+def test_daily_retrain_rolls_over_after_window() -> None:
+    next_at = _load_next_retrain_at(day=0, hour=3)
+
+    assert next_at(_utc(2026, 10, 14, 1, 0), daily=True) == _utc(2026, 10, 14, 3, 0)
+    assert next_at(_utc(2026, 10, 14, 4, 0), daily=True) == _utc(2026, 10, 15, 3, 0)
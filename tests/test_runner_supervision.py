@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Sequence
+
+import pytest
+
+from conftest import load_run_bot_defs
+
+
+def _load_supervise():
+    namespace = load_run_bot_defs({"_supervise"}, asyncio=asyncio, Any=Any, Sequence=Sequence)
+    return namespace["_supervise"]
+
+
+def test_failing_loop_cancels_siblings_and_propagates() -> None:
+    supervise = _load_supervise()
+    cancelled = []
+
+    async def forever() -> None:
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append("forever")
+            raise
+
+    async def boom() -> None:
+        await asyncio.sleep(0)
+        raise RuntimeError("loop died")
+
+    with pytest.raises(RuntimeError, match="loop died"):
+        asyncio.run(supervise([forever(), boom()]))
+    assert cancelled == ["forever"]
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from sqlalchemy import CheckConstraint, Integer, String, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from conftest import load_run_bot_defs
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class _Token(_Base):
+    __tablename__ = "tokens"
+    __table_args__ = (CheckConstraint("score >= 0"),)
+
+    address: Mapped[str] = mapped_column(String, primary_key=True)
+    score: Mapped[int] = mapped_column(Integer, default=0)
+
+
+def _load():
+    return load_run_bot_defs(
+        {
+            "_pending_token_rows",
+            "_token_row_failures",
+            "_TOKEN_ROW_MAX_TRIES",
+            "_upsert_token_rows",
+            "_flush_token_rows",
+        },
+        Any=Any,
+        Dict=Dict,
+        List=List,
+        SessionLocal=AsyncSession,
+        SQLAlchemyError=SQLAlchemyError,
+        Token=_Token,
+        sqlite_insert=sqlite_insert,
+        log=logging.getLogger("test_token_row_flush"),
+    )
+
+
+def test_poison_row_does_not_block_the_rest_and_is_dropped_after_max_tries() -> None:
+    async def _run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(_Base.metadata.create_all)
+        maker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+        ns = _load()
+        pending = ns["_pending_token_rows"]
+        pending.update({
+            "good1": {"address": "good1", "score": 1},
+            "bad": {"address": "bad", "score": -1},
+            "good2": {"address": "good2", "score": 2},
+        })
+        written = []
+        async with maker() as ses:
+            written.append(await ns["_flush_token_rows"](ses))
+            kept_after_first = set(pending)
+            pending["good3"] = {"address": "good3", "score": 3}
+            for _ in range(ns["_TOKEN_ROW_MAX_TRIES"] - 1):
+                written.append(await ns["_flush_token_rows"](ses))
+        async with maker() as ses:
+            stored = set((await ses.execute(select(_Token.address))).scalars())
+        await engine.dispose()
+        return written, kept_after_first, set(pending), dict(ns["_token_row_failures"]), stored
+
+    written, kept_after_first, pending, failures, stored = asyncio.run(_run())
+    assert written == [2, 1, 0]
+    assert kept_after_first == {"bad"}
+    assert pending == set() and failures == {}
+    assert stored == {"good1", "good2", "good3"}
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import datetime as dt
+from typing import Any, Dict, Optional
+
+from conftest import load_run_bot_defs
+
+
+def _load_window_check(allowed_hours: set[int], clock: list[float]):
+    return load_run_bot_defs(
+        {"_in_trading_window", "_WINDOW_CACHE"},
+        dt=dt,
+        Any=Any,
+        Dict=Dict,
+        Optional=Optional,
+        time=type("_Clock", (), {"time": staticmethod(lambda: clock[0])}),
+        _HAS_WINDOWS=True,
+        _HOUR_ALLOWED=bytes(1 if h in allowed_hours else 0 for h in range(24)),
+    )
+
+
+def test_verdict_is_cached_until_the_next_local_hour() -> None:
+    start = dt.datetime(2026, 3, 10, 9, 59, 30).timestamp()
+    clock = [start]
+    ns = _load_window_check({9}, clock)
+    check = ns["_in_trading_window"]
+
+    assert check() is True
+    assert ns["_WINDOW_CACHE"]["until"] == dt.datetime(2026, 3, 10, 10, 0, 0).timestamp()
+
+    clock[0] = start + 20          # 09:59:50 → sigue cacheado
+    assert check() is True
+    clock[0] = start + 31          # 10:00:01 → nueva hora, hora no operable
+    assert check() is False
+
+    # con hora explícita no se usa la caché
+    assert check(dt.datetime(2026, 3, 10, 9, 15)) is True
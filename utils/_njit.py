@@ -0,0 +1,45 @@
+# memebot3/utils/_njit.py
+"""
+`njit` con degradación elegante.
+
+Si numba está instalado se usa `numba.njit` tal cual; si no, el decorador
+devuelve la función Python sin tocar, de modo que los kernels numéricos
+(funciones puras sobre arrays NumPy) siguen funcionando sin JIT:
+
+    from utils._njit import njit
+
+    @njit(cache=True)
+    def _kernel(arr, n): ...
+
+Soporta las tres formas habituales: `@njit`, `@njit(cache=True)` y
+`@njit("sig", cache=True)` (firma explícita → compilación en import).
+Con `cache=True`, apuntar `NUMBA_CACHE_DIR` a una ruta persistente hace que
+la compilación se pague una sola vez entre reinicios.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable
+
+log = logging.getLogger("njit")
+
+try:  # pragma: no cover - depende del entorno
+    from numba import njit as _numba_njit
+
+    HAS_NUMBA = True
+except Exception:  # noqa: BLE001 – numba ausente o roto (ABI numpy)
+    _numba_njit = None
+    HAS_NUMBA = False
+    log.debug("numba no disponible: kernels @njit en Python puro")
+
+
+def njit(*args: Any, **kwargs: Any) -> Callable:
+    if HAS_NUMBA:
+        return _numba_njit(*args, **kwargs)
+    # @njit sin paréntesis → args == (func,)
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return args[0]
+    return lambda func: func
+
+
+__all__ = ["njit", "HAS_NUMBA"]
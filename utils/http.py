@@ -0,0 +1,89 @@
+# memebot3/utils/http.py
+"""
+Sesión aiohttp compartida (keep-alive) para los fetchers del hot path.
+
+Abrir un `ClientSession` por petición obliga a repetir TCP+TLS en cada
+llamada. Aquí se mantiene un único pool por event-loop:
+
+    from utils.http import get_session
+    async with get_session().get(url, timeout=...) as resp: ...
+
+• `warmup(urls)` abre una conexión por host al arrancar (HEAD best-effort).
+• `close_session()` cierra el pool al apagar.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+log = logging.getLogger("http")
+
+_LIMIT = 200
+_LIMIT_PER_HOST = 16
+_KEEPALIVE_S = 120.0
+_WARMUP_TIMEOUT_S = 5.0
+
+_SESSION: Optional[aiohttp.ClientSession] = None
+_SESSION_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Devuelve la sesión compartida (la crea en el loop actual si hace falta)."""
+    global _SESSION, _SESSION_LOOP
+    loop = asyncio.get_running_loop()
+    if _SESSION is None or _SESSION.closed or _SESSION_LOOP is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=_LIMIT,
+            limit_per_host=_LIMIT_PER_HOST,
+            keepalive_timeout=_KEEPALIVE_S,
+        )
+        _SESSION = aiohttp.ClientSession(connector=connector)
+        _SESSION_LOOP = loop
+    return _SESSION
+
+
+async def close_session() -> None:
+    global _SESSION, _SESSION_LOOP
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+    _SESSION_LOOP = None
+
+
+def _origin(url: str) -> Optional[str]:
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return None
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+async def warmup(urls: Iterable[str]) -> int:
+    """
+    Precalienta una conexión keep-alive por host (HEAD a la raíz).
+    Devuelve cuántos hosts respondieron; los fallos se ignoran.
+    """
+    origins = sorted({o for o in (_origin(u) for u in urls if u) if o})
+    if not origins:
+        return 0
+    sess = get_session()
+    timeout = aiohttp.ClientTimeout(total=_WARMUP_TIMEOUT_S)
+
+    async def _head(origin: str) -> bool:
+        async with sess.head(origin, timeout=timeout, allow_redirects=False):
+            return True
+
+    results = await asyncio.gather(*(_head(o) for o in origins), return_exceptions=True)
+    ok = 0
+    for origin, res in zip(origins, results):
+        if isinstance(res, BaseException):
+            log.debug("[http] warmup %s → %s", origin, res)
+        else:
+            ok += 1
+    return ok
+
+
+__all__ = ["get_session", "close_session", "warmup"]
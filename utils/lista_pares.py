@@ -16,6 +16,7 @@ Cambios 2025-08-02
 
 from __future__ import annotations
 
+import atexit
 import logging
 import os
 import pathlib
@@ -48,6 +49,7 @@ log = logging.getLogger("lista_pares")
 # ─── estructuras internas ─────────────────────────────────────
 _pair_watch: Dict[str, Dict[str, float | int | str]] = {}
 _processed:  set[str] = set()
+_pending_persist: list[str] = []   # procesados aún no volcados a CACHE_FILE
 
 # ─── helpers caché disco ──────────────────────────────────────
 def _load_cache() -> set[str]:
@@ -58,12 +60,25 @@ def _load_cache() -> set[str]:
 
 _processed.update(_load_cache())
 
-def _persist(addr: str) -> None:
+def flush_processed() -> int:
+    """
+    Vuelca a disco los pares procesados pendientes con un único append.
+    run_bot lo llama una vez por tick; también se ejecuta al salir.
+    """
+    if not _pending_persist:
+        return 0
+    batch = list(_pending_persist)
+    _pending_persist.clear()
     try:
         with CACHE_FILE.open("a") as f:
-            f.write(addr + "\n")
+            f.write("".join(addr + "\n" for addr in batch))
     except Exception as exc:  # noqa: BLE001
+        _pending_persist[:0] = batch
         log.warning("[lista_pares] No se pudo escribir cache: %s", exc)
+        return 0
+    return len(batch)
+
+atexit.register(flush_processed)
 
 # ─── API pública ───────────────────────────────────────────────
 def agregar_si_nuevo(addr: str, retries: int | None = None) -> bool:
@@ -174,7 +189,7 @@ def eliminar_par(addr: str) -> None:
     _pair_watch.pop(addr, None)
     if addr not in _processed:
         _processed.add(addr)
-        _persist(addr)
+        _pending_persist.append(addr)
 
 def retries_left(addr: str) -> int:
     meta = _pair_watch.get(addr)
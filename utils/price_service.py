@@ -13,6 +13,7 @@ Orden de fuentes (2025-08):
 Extras:
 • Reintento corto de toda la cadena ante fallo transitorio.
 • Cacheo de aciertos y fallos (TTL configurable vía .env DEXS_TTL_NIL).
+• Consultas concurrentes del mismo mint/modo se agrupan en una sola (single-flight).
 • Bloqueo de direcciones no Solana (0x…).
 • Modo “solo precio”: acepta sólo price_usd (evita caer a fallback del buy_price).
 • Si hay router Jupiter, añade `price_impact_bps` y `price_impact_pct` al dict.
@@ -443,6 +444,10 @@ async def _query_sources(address: str, *, use_gt: bool, fields_needed: Tuple[str
     return _strip_non_t0_keys(tok)
 
 
+# (cache_key, critical, allow_partial) → tarea en vuelo
+_INFLIGHT: Dict[Tuple[str, bool, bool], "asyncio.Future[Optional[Dict[str, Any]]]"] = {}
+
+
 # ───────────────────────── API principal ──────────────────────────
 async def get_price(
     address: str,
@@ -511,6 +516,49 @@ async def get_price(
                 partial_hit.setdefault("address", address)
             return _strip_non_t0_keys(partial_hit)
 
+    # Single-flight: si ya hay una consulta igual en vuelo, se espera su resultado.
+    # La tarea compartida termina aunque se cancele quien la lanzó (rellena la caché).
+    flight_key = (ck, critical, allow_partial)
+    task = _INFLIGHT.get(flight_key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(
+            _fetch_price(
+                address,
+                ck=ck,
+                partial_ck=partial_ck,
+                use_gt=use_gt,
+                critical=critical,
+                price_only=price_only,
+                allow_partial=allow_partial,
+                fields_needed=fields_needed,
+            )
+        )
+        _INFLIGHT[flight_key] = task
+        task.add_done_callback(lambda _t: _inflight_done(flight_key, _t))
+    return await asyncio.shield(task)
+
+
+def _inflight_done(flight_key: Tuple[str, bool, bool], task: "asyncio.Future[Any]") -> None:
+    # Solo se retira si sigue siendo la tarea registrada (otro loop puede
+    # haberla sustituido); recoger la excepción evita "never retrieved"
+    # cuando todos los que esperaban se cancelaron.
+    if _INFLIGHT.get(flight_key) is task:
+        del _INFLIGHT[flight_key]
+    task.cancelled() or task.exception()
+
+
+async def _fetch_price(
+    address: str,
+    *,
+    ck: str,
+    partial_ck: str,
+    use_gt: bool,
+    critical: bool,
+    price_only: bool,
+    allow_partial: bool,
+    fields_needed: Tuple[str, ...],
+) -> Optional[Dict[str, Any]]:
+    """Cadena de fuentes + reintento tras un fallo de caché (ver `get_price`)."""
     # Primer intento de la cadena (Jupiter primero)
     tok = await _query_sources(address, use_gt=use_gt, fields_needed=fields_needed)
 
@@ -527,7 +575,6 @@ async def get_price(
     # Reintento corto (fallos transitorios)
     if _RETRY_ON_FAIL > 0:
         try:
-            import asyncio
             await asyncio.sleep(_RETRY_DELAY_S)
         except Exception:
             pass